@@ -0,0 +1,376 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import discord
+from aiohttp import web
+
+from src.bot import FreeGamesBot
+from src.parse_pool import ParsePool
+
+from .payloads import build_epic_catalog, epic_fixture, steam_catalog_rows, steam_results_body, steam_store_items_body
+
+# The recorded fixtures hold 6 Epic elements and 10 Steam rows; --scale
+# multiplies both.
+EPIC_ELEMENTS = 6
+STEAM_ROWS = 10
+
+DEFAULT_OUTPUT = Path(__file__).parent / "results" / "bench_cycle.json"
+
+
+class StoreStub:
+    # Stands in for the Epic and Steam endpoints the stores call, with a
+    # configurable response delay and share of failed requests.
+    def __init__(
+        self,
+        epic_body: bytes,
+        steam_rows: list[str],
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        etag: bool = False,
+        seed: int = 0
+    ):
+        self.epic_body = epic_body
+        self.steam_rows = steam_rows
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.etag = etag
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+    
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/freeGamesPromotions", self.epic)
+        app.router.add_get("/search/results/", self.steam)
+        app.router.add_get("/IStoreBrowseService/GetItems/v1/", self.steam_items)
+        return app
+    
+    async def epic(self, request: web.Request) -> web.StreamResponse:
+        return await self._respond(request, self.epic_body)
+    
+    async def steam(self, request: web.Request) -> web.StreamResponse:
+        start = int(request.query.get("start", "0"))
+        count = int(request.query.get("count", "50"))
+        return await self._respond(request, steam_results_body(self.steam_rows, start, count))
+    
+    async def steam_items(self, request: web.Request) -> web.StreamResponse:
+        return await self._respond(request, steam_store_items_body(request.query["input_json"], datetime.utcnow()))
+    
+    async def _respond(self, request: web.Request, body: bytes) -> web.StreamResponse:
+        self.requests += 1
+        delay = self.latency + self.random.uniform(-self.latency_jitter, self.latency_jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        
+        if self.random.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=503, text="injected failure")
+        
+        headers = {}
+        if self.etag:
+            tag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            headers["ETag"] = tag
+            if request.headers.get("If-None-Match") == tag:
+                self.not_modified += 1
+                return web.Response(status=304, headers=headers)
+        
+        self.bytes_sent += len(body)
+        return web.Response(body=body, content_type="application/json", headers=headers)
+
+
+class FakeChannel(discord.TextChannel):
+    # Passes DeliveryScheduler's TextChannel check without a gateway
+    # connection and records what would have been sent.
+    def __init__(self, channel_id: int, latency: float = 0.0):
+        self.id = channel_id
+        self.latency = latency
+        self.sent: list[tuple[Optional[str], int]] = []
+    
+    async def send(self, content: Optional[str] = None, *, embeds: Optional[list[discord.Embed]] = None, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.sent.append((content, len(embeds or [])))
+        # The bot keeps the message ID to edit or reply to the alert later.
+        return discord.Object(id=len(self.sent))
+
+
+class TimedParsePool(ParsePool):
+    def __init__(self, mode: str = "thread", workers: Optional[int] = None):
+        super().__init__(mode, workers)
+        self.timings: dict[str, list[float]] = defaultdict(list)
+    
+    async def run(self, func, *args):
+        start = time.perf_counter()
+        try:
+            return await super().run(func, *args)
+        finally:
+            self.timings[func.__name__].append(time.perf_counter() - start)
+
+
+# Which store each parse function belongs to, for the per-store breakdown.
+PARSE_FUNCTIONS = {"epic": "parse_promotions", "steam": "parse_page"}
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def summarize(values: list[float]) -> dict:
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(max(values, default=0.0) * 1000, 3),
+        "total_ms": round(sum(values) * 1000, 3)
+    }
+
+
+async def run_scale_async(config: dict) -> dict:
+    scale = config["scale"]
+    workdir = tempfile.mkdtemp(prefix="bench-cycle-")
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "bench.db")
+    os.environ["HTTP_CACHE_DIR"] = os.path.join(workdir, "http")
+    os.environ["PARSE_EXECUTOR"] = config["executor"]
+    os.environ["EPIC_REGIONS"] = config["epic_regions"]
+    
+    stub = StoreStub(
+        build_epic_catalog(epic_fixture(), EPIC_ELEMENTS * scale, datetime.utcnow()),
+        steam_catalog_rows(STEAM_ROWS * scale),
+        latency=config["latency_ms"] / 1000,
+        latency_jitter=config["latency_jitter_ms"] / 1000,
+        error_rate=config["error_rate"],
+        etag=config["with_cache"],
+        seed=config["seed"]
+    )
+    runner = web.AppRunner(stub.app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    
+    bot = FreeGamesBot()
+    bot.parse_pool = TimedParsePool(config["executor"])
+    for store in bot.stores:
+        store.parse_pool = bot.parse_pool
+        if store.key == "epic":
+            store.API_URL = f"{base_url}/freeGamesPromotions"
+        elif store.key == "steam":
+            store.SEARCH_RESULTS_URL = f"{base_url}/search/results/"
+            store.details.API_URL = f"{base_url}/IStoreBrowseService/GetItems/v1/"
+            store.details.parse_pool = bot.parse_pool
+            # Let the walk reach every row of the synthetic catalog.
+            store.max_pages = max(store.max_pages, -(-STEAM_ROWS * scale // store.page_size))
+    if not config["with_cache"]:
+        bot.store_http.cache = None
+    
+    channels = {}
+    for guild in range(config["guilds"]):
+        channel = FakeChannel(900_000 + guild, latency=config["discord_latency_ms"] / 1000)
+        channels[channel.id] = channel
+    bot.get_channel = channels.get
+    
+    bot.posted_store.open()
+    bot.guild_configs.open()
+    bot.store_results.open()
+    bot.alerts.open()
+    for guild, channel_id in enumerate(channels):
+        bot.guild_configs.set_channel(100_000 + guild, channel_id)
+    await bot.store_http.open()
+    bot.parse_pool.start()
+    
+    cycles: list[float] = []
+    fetch_times: dict[str, list[float]] = defaultdict(list)
+    delivery_times: list[float] = []
+    rate_limit_waits: list[float] = []
+    games_per_cycle: list[int] = []
+    
+    async def cycle() -> float:
+        # Forget what was posted so every cycle parses, dedups and delivers
+        # the full catalog, like the first check after a rotation.
+        with bot.posted_store.conn:
+            bot.posted_store.conn.execute("DELETE FROM posted_offers")
+        start = time.perf_counter()
+        new_games = await bot._check_and_post_games()
+        elapsed = time.perf_counter() - start
+        games_per_cycle.append(len(new_games))
+        return elapsed
+    
+    try:
+        for _ in range(config["warmup"]):
+            await cycle()
+        for timings in bot.parse_pool.timings.values():
+            timings.clear()
+        games_per_cycle.clear()
+        
+        for _ in range(config["cycles"]):
+            cycles.append(await cycle())
+            for result in bot.snapshot.results.values():
+                fetch_times[result.store.key].append(result.elapsed)
+            report = bot.delivery.last_report
+            if report:
+                delivery_times.append(report.elapsed)
+                rate_limit_waits.append(report.rate_limit_wait)
+        
+        # Allocation tracing slows everything down, so it gets its own cycle
+        # outside the timed ones.
+        tracemalloc.start(10)
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        await cycle()
+        after, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().statistics("lineno")[:5]
+        tracemalloc.stop()
+    finally:
+        await bot.store_http.close()
+        bot.parse_pool.shutdown()
+        bot.posted_store.close()
+        bot.guild_configs.close()
+        bot.store_results.close()
+        bot.alerts.close()
+        await runner.cleanup()
+    
+    stores = {}
+    for store in bot.stores:
+        stores[store.key] = {
+            "fetch": summarize(fetch_times[store.key]),
+            "parse": summarize(bot.parse_pool.timings[PARSE_FUNCTIONS.get(store.key, "")])
+        }
+    
+    return {
+        "scale": scale,
+        "catalog": {"epic_elements": EPIC_ELEMENTS * scale, "steam_rows": STEAM_ROWS * scale},
+        "cycle": summarize(cycles),
+        "stores": stores,
+        "delivery": {
+            **summarize(delivery_times),
+            "rate_limit_wait_ms": round(sum(rate_limit_waits) * 1000, 3),
+            "messages_sent": sum(len(channel.sent) for channel in channels.values())
+        },
+        "games_per_cycle": max(games_per_cycle, default=0),
+        "stub": {
+            "requests": stub.requests,
+            "errors_injected": stub.errors,
+            "not_modified": stub.not_modified,
+            "bytes_sent": stub.bytes_sent
+        },
+        "memory": {
+            # ru_maxrss is in KiB on Linux and bytes on macOS.
+            "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024),
+            "traced_peak_bytes": peak - before,
+            "traced_retained_bytes": after - before,
+            "top_allocations": [
+                {"where": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", "bytes": stat.size, "blocks": stat.count}
+                for stat in top
+            ]
+        }
+    }
+
+
+def run_scale(config: dict) -> dict:
+    return asyncio.run(run_scale_async(config))
+
+
+def compare(current: list[dict], baseline_path: Path):
+    baseline = {run["scale"]: run for run in json.loads(baseline_path.read_text())["runs"]}
+    print(f"\ncompared with {baseline_path}:")
+    for run in current:
+        old = baseline.get(run["scale"])
+        if not old:
+            continue
+        for metric in ("p50_ms", "p99_ms"):
+            before = old["cycle"][metric]
+            after = run["cycle"][metric]
+            change = (after - before) / before * 100 if before else 0.0
+            print(f"  x{run['scale']:<4} cycle {metric[:3]}  {before:9.1f} ms -> {after:9.1f} ms  ({change:+.1f}%)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run full check cycles against a local Epic/Steam stand-in and a fake Discord channel")
+    parser.add_argument("--scales", default="1,10,100", help="comma-separated catalog multipliers")
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="stub response delay per request")
+    parser.add_argument("--latency-jitter-ms", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of stub requests answered with 503")
+    parser.add_argument("--discord-latency-ms", type=float, default=0.0, help="delay of each fake channel send")
+    parser.add_argument("--guilds", type=int, default=5)
+    parser.add_argument("--executor", default="thread", choices=ParsePool.MODES)
+    parser.add_argument("--epic-regions", default="US:en-US", help="EPIC_REGIONS value for the bot, e.g. US:en-US,GB:en-GB,DE:de-DE")
+    parser.add_argument("--with-cache", action="store_true", help="keep the HTTP cache on and let the stub answer 304")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--compare", type=Path, help="earlier results file to compare against")
+    args = parser.parse_args()
+    
+    config = {
+        "cycles": args.cycles,
+        "warmup": args.warmup,
+        "latency_ms": args.latency_ms,
+        "latency_jitter_ms": args.latency_jitter_ms,
+        "error_rate": args.error_rate,
+        "discord_latency_ms": args.discord_latency_ms,
+        "guilds": args.guilds,
+        "executor": args.executor,
+        "with_cache": args.with_cache,
+        "epic_regions": args.epic_regions,
+        "seed": args.seed
+    }
+    
+    runs = []
+    for scale in (int(value) for value in args.scales.split(",")):
+        # Each scale runs in a fresh interpreter so peak RSS belongs to it alone.
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            run = executor.submit(run_scale, {**config, "scale": scale}).result()
+        runs.append(run)
+        
+        print(
+            f"x{scale:<4} cycle p50 {run['cycle']['p50_ms']:9.1f} ms  p99 {run['cycle']['p99_ms']:9.1f} ms  "
+            f"games {run['games_per_cycle']:5d}  peak RSS {run['memory']['peak_rss_bytes'] / 1024 / 1024:6.1f} MiB  "
+            f"traced peak {run['memory']['traced_peak_bytes'] / 1024 / 1024:6.1f} MiB"
+        )
+        for key, store in run["stores"].items():
+            print(f"      {key:<6} fetch p50 {store['fetch']['p50_ms']:9.1f} ms  parse p50 {store['parse']['p50_ms']:9.1f} ms ({store['parse']['count']} call(s))")
+        print(f"      delivery p50 {run['delivery']['p50_ms']:9.1f} ms  ({run['delivery']['messages_sent']} message(s), {run['stub']['errors_injected']} injected error(s))")
+    
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps({
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "runs": runs
+    }, indent=2))
+    print(f"results written to {args.output}")
+    
+    if args.compare:
+        compare(runs, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
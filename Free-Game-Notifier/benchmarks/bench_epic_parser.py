@@ -0,0 +1,108 @@
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+
+from src.stores.epic_parser import JSON_BACKEND, parse_promotions, select_offers
+
+from .payloads import build_epic_catalog, epic_fixture
+
+STORE_NAME = "Epic Games Store"
+
+
+def legacy_parse(body: bytes) -> list[tuple]:
+    # The two-pass walk EpicGamesStore used before the single-pass parser:
+    # promotions are scanned once to decide "free now" and again for the end
+    # date, with a clock reading and fresh date parsing inside the loop.
+    data = json.loads(body)
+    elements = data.get("data", {}).get("Catalog", {}).get("searchStore", {}).get("elements", [])
+    
+    games = []
+    for game in elements:
+        if _legacy_is_currently_free(game):
+            games.append(_legacy_parse_game(game))
+    return games
+
+
+def _legacy_is_currently_free(game: dict) -> bool:
+    promotions = game.get("promotions")
+    if not promotions:
+        return False
+    for offer_group in promotions.get("promotionalOffers", []):
+        for offer in offer_group.get("promotionalOffers", []):
+            if offer.get("discountSetting", {}).get("discountPercentage", 0) == 0:
+                start_date = offer.get("startDate")
+                end_date = offer.get("endDate")
+                if start_date and end_date:
+                    now = datetime.utcnow()
+                    start = datetime.fromisoformat(start_date.replace("Z", "+00:00")).replace(tzinfo=None)
+                    end = datetime.fromisoformat(end_date.replace("Z", "+00:00")).replace(tzinfo=None)
+                    if start <= now <= end:
+                        return True
+    return False
+
+
+def _legacy_parse_game(game: dict) -> tuple:
+    title = game.get("title", "Unknown Game")
+    slug = game.get("productSlug") or game.get("urlSlug") or ""
+    kind = "bundles" if game.get("offerType") == "BUNDLE" else "p"
+    
+    image_url = None
+    key_images = game.get("keyImages", [])
+    for img in key_images:
+        if img.get("type") in ["Thumbnail", "OfferImageWide", "DieselStoreFrontWide"]:
+            image_url = img.get("url")
+            break
+    if not image_url and key_images:
+        image_url = key_images[0].get("url")
+    
+    end_date = None
+    for offer_group in game.get("promotions", {}).get("promotionalOffers", []):
+        for offer in offer_group.get("promotionalOffers", []):
+            if offer.get("discountSetting", {}).get("discountPercentage") == 0:
+                end_str = offer.get("endDate")
+                if end_str:
+                    end_date = datetime.fromisoformat(end_str.replace("Z", "+00:00")).replace(tzinfo=None)
+                    break
+    
+    return (title, f"https://store.epicgames.com/en-US/{kind}/{slug}", image_url, end_date)
+
+
+def new_parse(body: bytes, now: datetime) -> list[tuple]:
+    current, _ = select_offers(parse_promotions(body, STORE_NAME), now)
+    return [(game.title, game.url, game.image_url, game.end_date) for game in current]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the Epic promotions parser on a large catalog")
+    parser.add_argument("--size", type=int, default=20000, help="number of catalog elements")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    now = datetime.utcnow()
+    body = build_epic_catalog(epic_fixture(), args.size, now)
+    print(f"catalog: {args.size} elements, {len(body) / 1024 / 1024:.1f} MiB, JSON backend: {JSON_BACKEND}")
+    
+    expected = legacy_parse(body)
+    actual = new_parse(body, now)
+    if sorted(expected, key=repr) != sorted(actual, key=repr):
+        print(f"PARITY MISMATCH: legacy found {len(expected)} free games, single-pass found {len(actual)}")
+        return 1
+    print(f"parity: {len(actual)} free game(s) ok")
+    
+    legacy = min(_time(lambda: legacy_parse(body)) for _ in range(args.repeat))
+    single = min(_time(lambda: new_parse(body, now)) for _ in range(args.repeat))
+    print(f"legacy two-pass   {legacy * 1000:8.1f} ms  {args.size / legacy:10.0f} elements/s")
+    print(f"single-pass       {single * 1000:8.1f} ms  {args.size / single:10.0f} elements/s  x{legacy / single:.1f}")
+    return 0
+
+
+def _time(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    sys.exit(main())
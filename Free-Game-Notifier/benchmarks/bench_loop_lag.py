@@ -0,0 +1,69 @@
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime
+
+from src.loop_monitor import LoopLagMonitor
+from src.parse_pool import ParsePool
+from src.stores.epic_parser import parse_promotions
+from src.stores.steam_parser import parse_results_page
+
+from .payloads import build_epic_catalog, epic_fixture, steam_catalog_rows, steam_results_body
+
+
+def steam_results(copies: int) -> bytes:
+    rows = steam_catalog_rows(copies * 10)
+    return steam_results_body(rows, 0, len(rows))
+
+
+async def measure(mode: str, steam_body: bytes, epic_body: bytes, rounds: int) -> tuple[float, float]:
+    pool = ParsePool(mode)
+    pool.start()
+    # Warm the pool up so worker start-up is not counted as parse lag.
+    await pool.run(parse_results_page, steam_results(1), "Steam", "fast")
+    
+    monitor = LoopLagMonitor(interval=0.01)
+    monitor.start()
+    await asyncio.sleep(0.1)
+    monitor.reset()
+    
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(
+            pool.run(parse_results_page, steam_body, "Steam", "fast"),
+            pool.run(parse_promotions, epic_body, "Epic Games Store")
+        )
+    elapsed = time.perf_counter() - start
+    
+    await asyncio.sleep(0.05)
+    max_lag = monitor.reset()
+    monitor.stop()
+    pool.shutdown()
+    return elapsed, max_lag
+
+
+async def run(args) -> None:
+    steam_body = steam_results(args.steam_copies)
+    epic_body = build_epic_catalog(epic_fixture(), args.epic_size, datetime.utcnow())
+    print(
+        f"Steam page: {len(steam_body) / 1024:.0f} KiB, Epic catalog: {len(epic_body) / 1024 / 1024:.1f} MiB, "
+        f"{args.rounds} round(s)"
+    )
+    
+    for mode in ParsePool.MODES:
+        elapsed, max_lag = await measure(mode, steam_body, epic_body, args.rounds)
+        print(f"{mode:<8} wall {elapsed * 1000:8.0f} ms   max event loop lag {max_lag * 1000:8.1f} ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure event loop lag while store payloads are parsed")
+    parser.add_argument("--steam-copies", type=int, default=20, help="times to repeat the fixture rows in the Steam page")
+    parser.add_argument("--epic-size", type=int, default=5000, help="number of elements in the Epic catalog")
+    parser.add_argument("--rounds", type=int, default=3)
+    asyncio.run(run(parser.parse_args()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
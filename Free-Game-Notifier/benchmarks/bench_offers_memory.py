@@ -0,0 +1,141 @@
+import argparse
+import gc
+import json
+import pickle
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from src.stores.base import FreeGame, dump_games, load_games
+
+
+@dataclass
+class LegacyFreeGame:
+    # FreeGame as it was before it became slotted: a __dict__ per instance,
+    # its own copy of the store name, and the key rebuilt on every lookup.
+    title: str
+    description: str
+    store: str
+    url: str
+    image_url: Optional[str] = None
+    original_price: Optional[str] = None
+    end_date: Optional[datetime] = None
+    offer_id: Optional[str] = None
+    start_date: Optional[datetime] = None
+    
+    @property
+    def key(self) -> tuple[str, str]:
+        return (self.store, self.offer_id or self.title)
+    
+    def __hash__(self):
+        return hash(self.key)
+    
+    def __eq__(self, other):
+        if isinstance(other, LegacyFreeGame):
+            return self.key == other.key
+        return False
+
+
+def offer_records(count: int) -> bytes:
+    # Offers as they come back from disk or a worker: every field, the store
+    # name included, is a freshly decoded string.
+    end = datetime(2026, 1, 1)
+    records = []
+    for i in range(count):
+        store = "Steam" if i % 2 else "Epic Games Store"
+        records.append({
+            "title": f"Game {i}",
+            "description": f"Originally ${i % 60}.99 - Now 100% OFF!",
+            "store": store,
+            "url": f"https://store.steampowered.com/app/{i}/",
+            "image_url": f"https://cdn.example.com/apps/{i}/capsule.jpg",
+            "original_price": f"${i % 60}.99",
+            "end_date": (end + timedelta(hours=i % 500)).isoformat(),
+            "offer_id": str(i)
+        })
+    return json.dumps(records).encode()
+
+
+def build(cls, data: bytes) -> list:
+    games = []
+    for record in json.loads(data):
+        record["end_date"] = datetime.fromisoformat(record["end_date"])
+        games.append(cls(**record))
+    return games
+
+
+def measure_memory(load) -> tuple[int, list]:
+    gc.collect()
+    tracemalloc.start()
+    games = load()
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return retained, games
+
+
+def change(size: int, baseline: int) -> str:
+    ratio = size / baseline - 1
+    return f"{abs(ratio) * 100:.0f}% {'less' if ratio < 0 else 'more'}"
+
+
+def time_it(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare memory and lookup cost of the FreeGame model on a large offer set")
+    parser.add_argument("--offers", type=int, default=100_000)
+    args = parser.parse_args()
+    
+    data = offer_records(args.offers)
+    legacy_bytes, legacy = measure_memory(lambda: build(LegacyFreeGame, data))
+    slotted_bytes, slotted = measure_memory(lambda: build(FreeGame, data))
+    records = dump_games(slotted)
+    loaded_bytes, _ = measure_memory(lambda: load_games(records))
+    
+    print(f"{args.offers} offers")
+    print(f"legacy dataclass   {legacy_bytes / 1024 / 1024:8.1f} MiB  {legacy_bytes / args.offers:6.0f} B/offer")
+    print(f"slotted FreeGame   {slotted_bytes / 1024 / 1024:8.1f} MiB  {slotted_bytes / args.offers:6.0f} B/offer  "
+          f"({change(slotted_bytes, legacy_bytes)})")
+    print(f"loaded from records{loaded_bytes / 1024 / 1024:8.1f} MiB  {loaded_bytes / args.offers:6.0f} B/offer  "
+          f"({change(loaded_bytes, legacy_bytes)})")
+    print(f"distinct store name objects: legacy {len({id(game.store) for game in legacy})}, slotted {len({id(game.store) for game in slotted})}")
+    
+    legacy_probe = build(LegacyFreeGame, data)
+    slotted_probe = build(FreeGame, data)
+    legacy_set = set(legacy)
+    slotted_set = set(slotted)
+    legacy_lookup = time_it(lambda: sum(game in legacy_set for game in legacy_probe))
+    slotted_lookup = time_it(lambda: sum(game in slotted_set for game in slotted_probe))
+    legacy_dedup = time_it(lambda: {game.key: game for game in legacy})
+    slotted_dedup = time_it(lambda: {game.key: game for game in slotted})
+    print(f"set membership     legacy {legacy_lookup * 1000:7.1f} ms  slotted {slotted_lookup * 1000:7.1f} ms  x{legacy_lookup / slotted_lookup:.1f}")
+    print(f"dedup by key       legacy {legacy_dedup * 1000:7.1f} ms  slotted {slotted_dedup * 1000:7.1f} ms  x{legacy_dedup / slotted_dedup:.1f}")
+    
+    pickled = pickle.dumps(slotted, protocol=pickle.HIGHEST_PROTOCOL)
+    legacy_pickled = pickle.dumps(legacy, protocol=pickle.HIGHEST_PROTOCOL)
+    dump_time = time_it(lambda: dump_games(slotted))
+    load_time = time_it(lambda: load_games(records))
+    print(f"serialized         records {len(records) / 1024 / 1024:6.1f} MiB  pickle {len(pickled) / 1024 / 1024:6.1f} MiB  "
+          f"legacy pickle {len(legacy_pickled) / 1024 / 1024:6.1f} MiB")
+    print(f"records            dump {dump_time * 1000:7.1f} ms  load {load_time * 1000:7.1f} ms")
+    
+    restored = load_games(records)
+    if restored != slotted or any(a.end_date != b.end_date or a.title != b.title for a, b in zip(restored, slotted)):
+        print("ROUND TRIP MISMATCH")
+        return 1
+    print("round trip: ok")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+PHASES = ("import_discord", "import_bot", "init", "setup_hook", "first_check")
+HEAVY_MODULES = ("bs4", "lxml", "aiohttp.web")
+
+
+async def _startup(timings: dict):
+    from aiohttp import web
+    
+    from .bench_cycle import EPIC_ELEMENTS, STEAM_ROWS, StoreStub
+    from .payloads import build_epic_catalog, epic_fixture, steam_catalog_rows
+    
+    import src.bot
+    
+    stub = StoreStub(build_epic_catalog(epic_fixture(), EPIC_ELEMENTS, datetime.utcnow()), steam_catalog_rows(STEAM_ROWS))
+    runner = web.AppRunner(stub.app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    
+    start = time.perf_counter()
+    bot = src.bot.FreeGamesBot()
+    timings["init"] = time.perf_counter() - start
+    
+    for store in bot.stores:
+        if store.key == "epic":
+            store.API_URL = f"{base_url}/freeGamesPromotions"
+        elif store.key == "steam":
+            store.SEARCH_RESULTS_URL = f"{base_url}/search/results/"
+            store.details.API_URL = f"{base_url}/IStoreBrowseService/GetItems/v1/"
+    
+    # setup_hook minus the steps that need Discord: syncing slash commands
+    # and starting the background loops.
+    async def sync():
+        return []
+    bot.tree.sync = sync
+    for loop in (bot.check_free_games, bot.expire_offers):
+        loop.start = lambda *args, **kwargs: None
+    
+    # Entered like bot.run() does, so the sharded client can close cleanly.
+    async with bot:
+        start = time.perf_counter()
+        await bot.setup_hook()
+        timings["setup_hook"] = time.perf_counter() - start
+        
+        # Right after login the bot reads the stores for the first time; with
+        # lazy loading that is also when store parsers get imported.
+        start = time.perf_counter()
+        await bot.snapshot.refresh()
+        timings["first_check"] = time.perf_counter() - start
+    
+    await runner.cleanup()
+
+
+def child(eager: bool):
+    timings = {}
+    
+    start = time.perf_counter()
+    import discord  # noqa: F401
+    timings["import_discord"] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    if eager:
+        # What importing the bot cost before stores were loaded lazily.
+        import src.keep_alive  # noqa: F401
+        import src.stores.steam_parser  # noqa: F401
+    import src.bot  # noqa: F401
+    timings["import_bot"] = time.perf_counter() - start
+    
+    loaded_at_import = {name: name in sys.modules for name in HEAVY_MODULES}
+    asyncio.run(_startup(timings))
+    print(json.dumps({"timings": timings, "loaded_at_import": loaded_at_import}))
+
+
+def run(eager: bool, env: dict) -> dict:
+    command = [sys.executable, "-m", "benchmarks.bench_startup", "--child"]
+    if eager:
+        command.append("--eager")
+    output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure import time and startup-to-ready time of the bot")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--eager", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        child(args.eager)
+        return 0
+    
+    workdir = tempfile.mkdtemp(prefix="bench-startup-")
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_PATH": os.path.join(workdir, "bench.db"),
+        "HTTP_CACHE_DIR": os.path.join(workdir, "http")
+    })
+    
+    # One throwaway run so every variant starts with warm bytecode caches.
+    run(False, env)
+    
+    for label, eager in (("eager", True), ("lazy", False)):
+        runs = [run(eager, env) for _ in range(args.runs)]
+        medians = {phase: statistics.median(result["timings"][phase] for result in runs) for phase in PHASES}
+        ready = medians["import_bot"] + medians["init"] + medians["setup_hook"]
+        
+        print(f"{label:<6} " + "  ".join(f"{phase} {medians[phase] * 1000:7.1f} ms" for phase in PHASES))
+        print(f"       bot import + init + setup_hook (before login) {ready * 1000:.1f} ms")
+        loaded = [name for name, present in runs[-1]["loaded_at_import"].items() if present]
+        print(f"       loaded after import: {', '.join(loaded) or 'none of ' + ', '.join(HEAVY_MODULES)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+import argparse
+import sys
+import time
+from dataclasses import astuple
+
+from src.stores.steam_parser import (
+    parse_search_html_fast,
+    parse_search_html_lxml,
+    parse_search_html_reference,
+)
+
+from .payloads import FIXTURES, inflate_steam_page
+
+STORE_NAME = "Steam"
+
+
+def _parsers() -> dict:
+    parsers = {
+        "reference": lambda html, limit: parse_search_html_reference(html, STORE_NAME, limit),
+        "fast[html.parser]": lambda html, limit: parse_search_html_fast(html, STORE_NAME, limit, parser="html.parser"),
+    }
+    try:
+        import lxml  # noqa: F401
+        parsers["fast[bs4+lxml]"] = lambda html, limit: parse_search_html_fast(html, STORE_NAME, limit, parser="lxml")
+        parsers["fast[lxml xpath]"] = lambda html, limit: parse_search_html_lxml(html, STORE_NAME, limit)
+    except ImportError:
+        print("lxml is not installed; skipping the lxml backend")
+    return parsers
+
+
+def check_parity(pages: dict[str, str], parsers: dict) -> bool:
+    all_ok = True
+    for name, html in pages.items():
+        page_ok = True
+        expected = [astuple(game) for game in parsers["reference"](html, None)]
+        for parser_name, parse in parsers.items():
+            actual = [astuple(game) for game in parse(html, None)]
+            if actual != expected:
+                page_ok = False
+                print(f"PARITY MISMATCH: {parser_name} on {name} ({len(actual)} vs {len(expected)} games)")
+        print(f"parity {name}: {len(expected)} free game(s) {'ok' if page_ok else 'FAILED'}")
+        all_ok = all_ok and page_ok
+    return all_ok
+
+
+def benchmark(html: str, parsers: dict, repeat: int) -> None:
+    rows = html.count("search_result_row ")
+    print(f"\n{rows} rows per page, best of {repeat}")
+    baseline = None
+    for parser_name, parse in parsers.items():
+        best = min(_time(parse, html) for _ in range(repeat))
+        rate = rows / best
+        baseline = baseline or rate
+        print(f"{parser_name:<20} {best * 1000:8.2f} ms  {rate:10.0f} rows/s  x{rate / baseline:.1f}")
+
+
+def _time(parse, html: str) -> float:
+    start = time.perf_counter()
+    parse(html, None)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Parity check and micro-benchmark for the Steam search parsers")
+    parser.add_argument("--copies", type=int, default=50, help="times to repeat the fixture rows for the benchmark page")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    parsers = _parsers()
+    pages = {path.name: path.read_text() for path in sorted(FIXTURES.glob("steam_search*.html"))}
+    if not pages:
+        print(f"No Steam fixtures found in {FIXTURES}")
+        return 1
+    
+    first = next(iter(pages.values()))
+    large = inflate_steam_page(first, args.copies)
+    pages[f"inflated x{args.copies}"] = large
+    
+    if not check_parity(pages, parsers):
+        return 1
+    
+    benchmark(large, parsers, args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
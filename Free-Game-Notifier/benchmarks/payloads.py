@@ -0,0 +1,109 @@
+import calendar
+import copy
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# The moment the recorded Epic fixture was captured; its promotion dates are
+# shifted by (now - RECORDED_AT) so "current" offers stay current.
+RECORDED_AT = datetime(2025, 10, 12, 12, 0, 0)
+
+_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{3}Z")
+_ROWS_RE = re.compile(r'<div id="search_resultsRows">(.*?)\s*</div>\s*</div>\s*</div>\s*</div>\s*<div id="footer"', re.S)
+_ROW_RE = re.compile(r'\s*<a href="https://store\.steampowered\.com/.*?</a>', re.S)
+_ROW_ID_RE = re.compile(r"/(?:app|sub|bundle)/(\d+)/")
+
+
+def steam_search_html() -> str:
+    return (FIXTURES / "steam_search.html").read_text()
+
+
+def steam_rows_html(html: str) -> str:
+    match = _ROWS_RE.search(html)
+    if not match:
+        raise ValueError("fixture has no search_resultsRows container")
+    return match.group(1)
+
+
+def inflate_steam_page(html: str, copies: int) -> str:
+    # Repeat the result rows of a recorded page so a benchmark sees a
+    # realistically large results container.
+    match = _ROWS_RE.search(html)
+    if not match:
+        raise ValueError("fixture has no search_resultsRows container")
+    return html[:match.start(1)] + match.group(1) * copies + html[match.end(1):]
+
+
+def steam_catalog_rows(total: int) -> list[str]:
+    # `total` result rows cycling through the recorded ones, each given its
+    # own item ID so they count as distinct offers.
+    templates = _ROW_RE.findall(steam_rows_html(steam_search_html()))
+    rows = []
+    for i in range(total):
+        template = templates[i % len(templates)]
+        original_id = _ROW_ID_RE.search(template).group(1)
+        rows.append(template.replace(original_id, str(5_000_000 + i)))
+    return rows
+
+
+def steam_results_body(rows: list[str], start: int, count: int) -> bytes:
+    return json.dumps({
+        "success": 1,
+        "results_html": "".join(rows[start:start + count]),
+        "total_count": len(rows),
+        "start": start
+    }).encode()
+
+
+def steam_store_items_body(input_json: str, now: datetime) -> bytes:
+    # What the store item API returns for the requested appids: a short
+    # description, a header asset and a free-weekend discount ending in two days.
+    ends = int(calendar.timegm(now.utctimetuple())) + 2 * 86400
+    items = []
+    for item in json.loads(input_json)["ids"]:
+        appid = item["appid"]
+        items.append({
+            "item_type": 0,
+            "id": appid,
+            "success": 1,
+            "appid": appid,
+            "name": f"App {appid}",
+            "basic_info": {"short_description": f"Short description of app {appid} &amp; its DLC."},
+            "assets": {"asset_url_format": f"steam/apps/{appid}/${{FILENAME}}?t=1700000000", "header": "header.jpg"},
+            "best_purchase_option": {
+                "discount_pct": 100,
+                "active_discounts": [{"discount_amount": "1999", "discount_description": "Free to keep", "discount_end_date": ends}]
+            }
+        })
+    return json.dumps({"response": {"store_items": items}}).encode()
+
+
+def epic_fixture() -> dict:
+    return json.loads((FIXTURES / "epic_free_games.json").read_text())
+
+
+def build_epic_catalog(fixture: dict, size: int, now: datetime) -> bytes:
+    # Grow the recorded payload to `size` elements with unique IDs, keeping
+    # its mix of free, upcoming and non-free promotions.
+    elements = fixture["data"]["Catalog"]["searchStore"]["elements"]
+    grown = []
+    for i in range(size):
+        element = copy.deepcopy(elements[i % len(elements)])
+        element["id"] = f"{i:032x}"
+        element["title"] = f"{element['title']} #{i}"
+        grown.append(element)
+    
+    payload = copy.deepcopy(fixture)
+    payload["data"]["Catalog"]["searchStore"]["elements"] = grown
+    body = json.dumps(payload)
+    
+    shift = now - RECORDED_AT
+    shifted = {}
+    for value in set(_DATE_RE.findall(body)):
+        moved = datetime.fromisoformat(value.replace("Z", "")) + shift
+        shifted[value] = moved.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    body = _DATE_RE.sub(lambda match: shifted[match.group(0)], body)
+    return body.encode()
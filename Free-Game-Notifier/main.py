@@ -1,3 +1,5 @@
+import argparse
+import asyncio
 import os
 from dotenv import load_dotenv
 from src.bot import FreeGamesBot
@@ -5,6 +7,25 @@ from src.bot import FreeGamesBot
 load_dotenv()
 
 def main():
+    parser = argparse.ArgumentParser(description="Free Games Discord bot")
+    parser.add_argument(
+        "mode",
+        nargs="?",
+        default=os.getenv("BOT_MODE", "all"),
+        choices=("all", "fetcher", "gateway"),
+        help="all: one process does everything (default); fetcher: only check the stores and publish deals; "
+             "gateway: only connect to Discord and post the deals a fetcher published"
+    )
+    args = parser.parse_args()
+    
+    if args.mode == "fetcher":
+        from src.worker import FetcherWorker
+        try:
+            asyncio.run(FetcherWorker().run())
+        except KeyboardInterrupt:
+            pass
+        return
+    
     token = os.getenv("DISCORD_BOT_TOKEN")
     
     if not token:
@@ -22,7 +43,7 @@ def main():
         print("=" * 50)
         return
     
-    bot = FreeGamesBot()
+    bot = FreeGamesBot(mode=args.mode)
     bot.run(token)
 
 if __name__ == "__main__":
@@ -3,48 +3,142 @@ from discord.ext import commands, tasks
 from discord import app_commands
 import asyncio
 import os
-from datetime import datetime
-from typing import Optional
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Optional
 
-from .stores import EpicGamesStore, SteamStore
-from .stores.base import FreeGame
+from .stores.base import BaseStore, FreeGame
+from .pipeline import CheckPipeline
+from .storage import GuildConfigStore, AlertStore, DealQueue, GuildConfig, AlertMessage
+from .delivery import DeliveryScheduler
+from .expiry import ExpiryIndex, REMIND
+from . import metrics
 
+if TYPE_CHECKING:
+    from .keep_alive import MetricsServer
 
 
-class FreeGamesBot(commands.Bot):
-    def __init__(self):
+
+class FreeGamesBot(commands.AutoShardedBot):
+    MODES = ("all", "gateway")
+    
+    def __init__(self, mode: str = "all"):
         intents = discord.Intents.default()
         
-        super().__init__(command_prefix="!", intents=intents)
+        # SHARD_COUNT / SHARD_IDS split the gateway across processes, e.g.
+        # SHARD_COUNT=4 with SHARD_IDS=0,1 in one process and 2,3 in another.
+        shard_count = os.getenv("SHARD_COUNT")
+        shard_ids = os.getenv("SHARD_IDS")
+        super().__init__(
+            command_prefix="!",
+            intents=intents,
+            shard_count=int(shard_count) if shard_count else None,
+            shard_ids=[int(shard) for shard in shard_ids.split(",")] if shard_ids else None
+        )
+        
+        # "all" checks the stores itself; "gateway" leaves that to a separate
+        # fetcher process and announces the deals it publishes.
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown mode {mode!r}; expected one of {', '.join(self.MODES)}")
+        self.mode = mode
+        
+        database_path = os.getenv("DATABASE_PATH", "data/freegames.db")
+        self.pipeline = CheckPipeline(database_path)
+        self.store_http = self.pipeline.store_http
+        self.parse_pool = self.pipeline.parse_pool
+        self.lag_monitor = self.pipeline.lag_monitor
+        self.stores = self.pipeline.stores
+        self.posted_store = self.pipeline.posted_store
+        self.store_results = self.pipeline.store_results
+        self.snapshot = self.pipeline.snapshot
+        self.scheduler = self.pipeline.scheduler
+        
+        self.guild_configs = GuildConfigStore(database_path)
+        self.alerts = AlertStore(database_path)
+        # Offers with an end date get an "ending soon" reply REMINDER_HOURS
+        # before they end (0 turns that off) and are cleaned up once they do.
+        self.expiry = ExpiryIndex(reminder_hours=float(os.getenv("REMINDER_HOURS", "24")))
+        
+        self.deal_queue = DealQueue(database_path)
+        self.consumer = os.getenv("GATEWAY_NAME") or "gateway-" + (shard_ids.replace(",", "-") if shard_ids else "all")
+        self._consume_lock = asyncio.Lock()
+        if mode == "gateway":
+            # /freegames reads what the fetcher last saved instead of asking
+            # the stores.
+            self.snapshot.fetch = False
+        
+        self.delivery = DeliveryScheduler(
+            self,
+            max_concurrency=int(os.getenv("DELIVERY_CONCURRENCY", "25")),
+            batch_embeds=os.getenv("BATCH_EMBEDS", "1").lower() not in ("0", "false", "no")
+        )
         
-        self.stores = [
-            EpicGamesStore(),
-            SteamStore()
-        ]
+        # The metrics endpoint (and aiohttp's server side) is only loaded when
+        # a port is configured.
+        self.metrics_server: Optional["MetricsServer"] = None
+        metrics_port = os.getenv("METRICS_PORT")
+        if metrics_port:
+            from .keep_alive import MetricsServer
+            self.metrics_server = MetricsServer(os.getenv("METRICS_HOST", "127.0.0.1"), int(metrics_port))
         
-        self.posted_games: set[tuple[str, str]] = set()
-        self.notification_channel_id: Optional[int] = None
-        self.ping_role_id: Optional[int] = None
+        # DISCORD_CHANNEL_ID / DISCORD_ROLE_ID seed the settings of the guild
+        # that owns the channel the first time the bot sees it.
+        self.default_channel_id: Optional[int] = None
+        self.default_role_id: Optional[int] = None
         
         channel_id = os.getenv("DISCORD_CHANNEL_ID")
         if channel_id:
-            self.notification_channel_id = int(channel_id)
+            self.default_channel_id = int(channel_id)
         
         role_id = os.getenv("DISCORD_ROLE_ID")
         if role_id:
-            self.ping_role_id = int(role_id)
+            self.default_role_id = int(role_id)
     
     async def setup_hook(self):
+        if self.mode == "gateway":
+            # No store traffic from here: just the shared database.
+            self.posted_store.open()
+            self.store_results.open()
+            self.snapshot.restore()
+            self.lag_monitor.start()
+            self.deal_queue.open()
+        else:
+            await self.pipeline.open()
+        self.guild_configs.open()
+        self.alerts.open()
+        for game, posted_at, reminded in self.alerts.pending():
+            self.expiry.add(game, posted_at, reminded)
+        if self.metrics_server:
+            await self.metrics_server.start()
         await self.add_cog(FreeGamesCog(self))
         await self.tree.sync()
         
-        self.check_free_games.start()
+        if self.mode == "gateway":
+            self.consume_deals.start()
+        else:
+            self.check_free_games.start()
+        self.expire_offers.start()
+    
+    async def close(self):
+        self.check_free_games.cancel()
+        self.consume_deals.cancel()
+        self.expire_offers.cancel()
+        if self.metrics_server:
+            await self.metrics_server.stop()
+        await self.pipeline.close()
+        self.guild_configs.close()
+        self.alerts.close()
+        self.deal_queue.close()
+        await super().close()
     
     async def on_ready(self):
         print(f"Bot is ready! Logged in as {self.user}")
         print(f"Monitoring {len(self.stores)} stores for free games")
-        if self.notification_channel_id:
-            print(f"Notification channel ID: {self.notification_channel_id}")
+        self._apply_default_channel()
+        
+        targets = self._targets()
+        if targets:
+            print(f"Posting to {len(targets)} notification channel(s)")
         else:
             print("No notification channel set. Use /setchannel to configure.")
         
@@ -56,52 +150,159 @@ class FreeGamesBot(commands.Bot):
         )
         await self.change_presence(activity=activity, status=discord.Status.online)
     
-    @tasks.loop(hours=1)
-    async def check_free_games(self):
-        if not self.notification_channel_id:
+    def _apply_default_channel(self):
+        if not self.default_channel_id:
             return
         
-        channel = self.get_channel(self.notification_channel_id)
+        channel = self.get_channel(self.default_channel_id)
         if not channel or not isinstance(channel, discord.TextChannel):
-            print(f"Could not find text channel {self.notification_channel_id}")
+            print(f"Could not find text channel {self.default_channel_id}")
+            return
+        
+        if self.guild_configs.get(channel.guild.id):
             return
         
-        await self._check_and_post_games(channel)
+        self.guild_configs.set_channel(channel.guild.id, channel.id)
+        if self.default_role_id:
+            self.guild_configs.set_role(channel.guild.id, self.default_role_id)
+    
+    @tasks.loop(seconds=30)
+    async def check_free_games(self):
+        # Checks run even before any server has a channel set: they are what
+        # keeps /freegames current.
+        due = self.pipeline.due_stores()
+        if due:
+            await self._check_and_post_games(due)
     
     @check_free_games.before_loop
     async def before_check(self):
         await self.wait_until_ready()
         await asyncio.sleep(10)
     
-    async def _check_and_post_games(self, channel: discord.TextChannel) -> list[FreeGame]:
-        all_free_games = []
-        
-        for store in self.stores:
-            try:
-                games = await store.get_free_games()
-                all_free_games.extend(games)
-            except Exception as e:
-                print(f"Error checking {store.name}: {e}")
-        
-        new_games = []
-        for game in all_free_games:
-            game_key = (game.title, game.store)
-            if game_key not in self.posted_games:
-                self.posted_games.add(game_key)
-                new_games.append(game)
-        
-        for game in new_games:
-            embed = self._create_game_embed(game)
-            
-            ping_text = ""
-            if self.ping_role_id:
-                ping_text = f"<@&{self.ping_role_id}> "
-            
-            await channel.send(content=f"{ping_text}🎮 **FREE GAME ALERT!**", embed=embed)
-            await asyncio.sleep(1)
-        
+    async def _check_and_post_games(self, stores: Optional[list[BaseStore]] = None) -> list[FreeGame]:
+        all_free_games, new_games = await self.pipeline.check(stores)
+        if new_games:
+            await self._announce(new_games)
+        self._follow_end_dates(all_free_games)
         return new_games
     
+    @tasks.loop(seconds=5)
+    async def consume_deals(self):
+        await self._consume_deals()
+    
+    @consume_deals.before_loop
+    async def before_consume(self):
+        await self.wait_until_ready()
+    
+    async def _consume_deals(self) -> list[FreeGame]:
+        # Events are acknowledged one at a time after they are handled, so a
+        # gateway that restarts picks up where it left off.
+        announced = []
+        async with self._consume_lock:
+            while True:
+                events = self.deal_queue.read(self.consumer)
+                if not events:
+                    break
+                for seq, kind, games in events:
+                    if kind == DealQueue.NEW:
+                        await self._announce(games)
+                        announced.extend(games)
+                    elif kind == DealQueue.UPDATED:
+                        self._follow_end_dates(games)
+                    self.deal_queue.ack(self.consumer, seq)
+        return announced
+    
+    async def _announce(self, games: list[FreeGame]):
+        embeds = [self._create_game_embed(game) for game in games]
+        report = await self.delivery.deliver(self._targets(), embeds, keys=[game.key for game in games])
+        self.alerts.record(games, report.sent)
+        for game in games:
+            self.expiry.add(game)
+    
+    def _follow_end_dates(self, games: list[FreeGame]):
+        for game in games:
+            if self.expiry.reschedule(game):
+                self.alerts.update_end(game)
+    
+    def _targets(self) -> list[GuildConfig]:
+        targets = self.guild_configs.targets()
+        if self.mode == "gateway":
+            # Settings are shared by every gateway; each one only posts to the
+            # guilds on its own shards.
+            targets = [target for target in targets if self.get_guild(target.guild_id)]
+        return targets
+    
+    def _own_messages(self, key: tuple[str, str]) -> list[AlertMessage]:
+        messages = self.alerts.messages_for(key)
+        if self.mode == "gateway":
+            messages = [message for message in messages if self.get_channel(message.channel_id)]
+        return messages
+    
+    @tasks.loop(seconds=60)
+    async def expire_offers(self):
+        due = self.expiry.due()
+        reminders = [game for kind, game in due if kind == REMIND]
+        if reminders:
+            await self._remind(reminders)
+        for kind, game in due:
+            if kind != REMIND:
+                await self._expire(game)
+        self.alerts.prune()
+    
+    @expire_offers.before_loop
+    async def before_expire(self):
+        await self.wait_until_ready()
+    
+    async def _remind(self, games: list[FreeGame]):
+        now = datetime.utcnow()
+        games = [game for game in games if game.end_date > now]
+        
+        # Offers announced together usually end together: each alert gets a
+        # single reply listing all of its offers that are ending.
+        by_message: dict[tuple[int, int], list[FreeGame]] = {}
+        for game in games:
+            for message in self._own_messages(game.key):
+                by_message.setdefault((message.channel_id, message.message_id), []).append(game)
+        
+        for (channel_id, message_id), ending in by_message.items():
+            await self.delivery.reply(channel_id, message_id, self._reminder_content(ending, now))
+        self.alerts.mark_reminded([game.key for game in games])
+    
+    def _reminder_content(self, games: list[FreeGame], now: datetime) -> str:
+        def ending_in(game: FreeGame) -> str:
+            hours = max(1, round((game.end_date - now).total_seconds() / 3600))
+            return f"{hours} hour{'s' if hours != 1 else ''}"
+        
+        if len(games) == 1:
+            game = games[0]
+            return f"⏰ **Ending in {ending_in(game)}:** [{game.title}]({game.url}) ({game.store})"
+        lines = [f"- [{game.title}]({game.url}) ({game.store}), in {ending_in(game)}" for game in games]
+        return "⏰ **Ending soon:**\n" + "\n".join(lines)
+    
+    async def _expire(self, game: FreeGame):
+        # Anything ending no later than this offer counts as over, even if the
+        # loop woke up a little early.
+        now = max(time.time(), game.end_date.replace(tzinfo=timezone.utc).timestamp())
+        retired = []
+        for message in self._own_messages(game.key):
+            ended = [title for title, end in message.offers if end is not None and end <= now]
+            running = [title for title, end in message.offers if end is None or end > now]
+            if running:
+                content = f"🎮 **FREE GAME ALERT!** — ⌛ ended: {', '.join(ended)}"
+            else:
+                content = "🎮 ~~FREE GAME ALERT!~~ ⌛ This deal has ended"
+            # Offers without an end date never need another edit.
+            if not any(end is not None and end > now for _, end in message.offers):
+                retired.append(message)
+            await self.delivery.edit(message.channel_id, message.message_id, content)
+        
+        # Forgetting the offer lets it be announced again if the store brings
+        # it back later.
+        self.posted_store.forget([game.key])
+        self.snapshot.drop(game.key)
+        self.alerts.forget(game.key, retired)
+        print(f"[expiry] {game.store}: {game.title} ended; updated {len(retired)} finished alert(s)")
+    
     def _create_game_embed(self, game: FreeGame) -> discord.Embed:
         if game.store == "Epic Games Store":
             color = discord.Color.from_rgb(0, 0, 0)
@@ -135,6 +336,13 @@ class FreeGamesBot(commands.Bot):
                 inline=True
             )
         
+        if game.regions and len(game.regions) > 1:
+            embed.add_field(
+                name="Free In",
+                value=" · ".join(f"{country} ~~{price}~~" if price else country for country, price in game.regions.items()),
+                inline=False
+            )
+        
         embed.add_field(name="Claim Now", value=f"[Click Here]({game.url})", inline=False)
         
         embed.set_footer(text="Free Games Bot")
@@ -150,21 +358,20 @@ class FreeGamesCog(commands.Cog):
     async def free_games(self, interaction: discord.Interaction):
         await interaction.response.defer()
         
-        all_games = []
-        for store in self.bot.stores:
-            try:
-                games = await store.get_free_games()
-                all_games.extend(games)
-            except Exception as e:
-                print(f"Error checking {store.name}: {e}")
+        all_games = await self.bot.snapshot.get()
         
         if not all_games:
             await interaction.followup.send("No free games found at the moment. Check back later!")
             return
         
+        description = f"Found {len(all_games)} free game(s)!"
+        for result in self.bot.snapshot.results.values():
+            if result.stale and result.fetched_at:
+                description += f"\n⚠️ {result.store.name} is not responding; showing its offers as of <t:{int(result.fetched_at)}:R>"
+        
         embed = discord.Embed(
             title="🎮 Current Free Games",
-            description=f"Found {len(all_games)} free game(s)!",
+            description=description,
             color=discord.Color.green(),
             timestamp=datetime.utcnow()
         )
@@ -184,7 +391,7 @@ class FreeGamesCog(commands.Cog):
     @app_commands.command(name="setchannel", description="Set the channel for free game notifications")
     @app_commands.default_permissions(administrator=True)
     async def set_channel(self, interaction: discord.Interaction, channel: discord.TextChannel):
-        self.bot.notification_channel_id = channel.id
+        self.bot.guild_configs.set_channel(interaction.guild_id, channel.id)
         await interaction.response.send_message(
             f"✅ Notifications will be sent to {channel.mention}",
             ephemeral=True
@@ -193,7 +400,7 @@ class FreeGamesCog(commands.Cog):
     @app_commands.command(name="setping", description="Set a role to ping for free game alerts")
     @app_commands.default_permissions(administrator=True)
     async def set_ping(self, interaction: discord.Interaction, role: discord.Role):
-        self.bot.ping_role_id = role.id
+        self.bot.guild_configs.set_role(interaction.guild_id, role.id)
         await interaction.response.send_message(
             f"✅ {role.mention} will be pinged for free game alerts",
             ephemeral=True
@@ -202,7 +409,8 @@ class FreeGamesCog(commands.Cog):
     @app_commands.command(name="checknow", description="Force check for new free games now")
     @app_commands.default_permissions(administrator=True)
     async def check_now(self, interaction: discord.Interaction):
-        if not self.bot.notification_channel_id:
+        config = self.bot.guild_configs.get(interaction.guild_id)
+        if not config or not config.channel_id:
             await interaction.response.send_message(
                 "❌ No notification channel set. Use /setchannel first.",
                 ephemeral=True
@@ -211,12 +419,17 @@ class FreeGamesCog(commands.Cog):
         
         await interaction.response.defer()
         
-        channel = self.bot.get_channel(self.bot.notification_channel_id)
+        channel = self.bot.get_channel(config.channel_id)
         if not channel or not isinstance(channel, discord.TextChannel):
             await interaction.followup.send("❌ Could not find the notification channel.")
             return
         
-        new_games = await self.bot._check_and_post_games(channel)
+        # A gateway doesn't check the stores itself; it posts whatever the
+        # fetcher has published that it hasn't handled yet.
+        if self.bot.mode == "gateway":
+            new_games = await self.bot._consume_deals()
+        else:
+            new_games = await self.bot._check_and_post_games()
         
         if new_games:
             await interaction.followup.send(f"✅ Found and posted {len(new_games)} new free game(s)!")
@@ -234,23 +447,91 @@ class FreeGamesCog(commands.Cog):
         stores_list = "\n".join([f"• {store.name}" for store in self.bot.stores])
         embed.add_field(name="Monitored Stores", value=stores_list, inline=False)
         
-        if self.bot.notification_channel_id:
-            channel = self.bot.get_channel(self.bot.notification_channel_id)
+        config = self.bot.guild_configs.get(interaction.guild_id)
+        
+        if config and config.channel_id:
+            channel = self.bot.get_channel(config.channel_id)
             if channel and isinstance(channel, discord.TextChannel):
                 channel_text = channel.mention
             else:
-                channel_text = f"ID: {self.bot.notification_channel_id}"
+                channel_text = f"ID: {config.channel_id}"
         else:
             channel_text = "Not set"
         embed.add_field(name="Notification Channel", value=channel_text, inline=True)
         
-        if self.bot.ping_role_id:
-            ping_text = f"<@&{self.bot.ping_role_id}>"
+        if config and config.role_id:
+            ping_text = f"<@&{config.role_id}>"
         else:
             ping_text = "None"
         embed.add_field(name="Ping Role", value=ping_text, inline=True)
         
-        embed.add_field(name="Check Interval", value="Every 1 hour", inline=True)
-        embed.add_field(name="Games Posted", value=str(len(self.bot.posted_games)), inline=True)
+        if self.bot.mode == "gateway":
+            shards = ", ".join(str(shard) for shard in sorted(self.bot.shards)) or "connecting"
+            embed.add_field(
+                name="Deal Feed",
+                value=f"{self.bot.deal_queue.pending(self.bot.consumer)} event(s) pending for {self.bot.consumer} (shards {shards})",
+                inline=False
+            )
+        else:
+            next_checks = []
+            for store in self.bot.stores:
+                next_check = self.bot.scheduler.next_check(store.key)
+                when = f"<t:{int(next_check)}:R>" if next_check else "Starting up"
+                next_checks.append(f"• {store.name}: {when}")
+            next_checks = "\n".join(next_checks)
+            embed.add_field(name="Next Check", value=next_checks, inline=False)
+        embed.add_field(name="Games Posted", value=str(self.bot.posted_store.count()), inline=True)
+        embed.add_field(name="Servers Notified", value=str(len(self.bot._targets())), inline=True)
+        
+        report = self.bot.delivery.last_report
+        if report:
+            embed.add_field(
+                name="Last Delivery",
+                value=f"{report.messages_sent} message(s) to {report.targets} server(s) in {report.elapsed:.1f}s",
+                inline=True
+            )
+        
+        # In a split deployment the store metrics live in the fetcher process
+        # and are read from its own /metrics endpoint.
+        if self.bot.mode != "gateway":
+            health = []
+            for store in self.bot.stores:
+                fetch = metrics.STORE_FETCH_SECONDS.labels(store.key)
+                if not fetch.count:
+                    health.append(f"• {store.name}: not checked yet")
+                    continue
+                parse = metrics.PARSE_SECONDS.labels(store.key)
+                offers = metrics.STORE_OFFERS.labels(store.key).get()
+                cache_hits = sum(metrics.HTTP_CACHE_HITS.labels(store.key, kind).value for kind in ("not_modified", "unchanged"))
+                failures = sum(metrics.STORE_FAILURES.labels(store.key, reason).value for reason in ("error", "timeout"))
+                downloaded = metrics.HTTP_RESPONSE_BYTES.labels(store.key).value / 1024 / 1024
+                line = (
+                    f"• {store.name}: {offers:.0f} offer(s), fetch {fetch.mean:.2f}s avg, parse {parse.mean * 1000:.0f} ms avg, "
+                    f"{downloaded:.1f} MiB downloaded, {cache_hits:.0f} cache hit(s), {failures:.0f} failure(s)"
+                )
+                if store.breaker.state == "open":
+                    line += f" — paused after repeated failures, retrying <t:{int(store.breaker.open_until)}:R>"
+                result = self.bot.snapshot.results.get(store.key)
+                if result and result.stale and result.fetched_at:
+                    line += f" — showing offers from <t:{int(result.fetched_at)}:R>"
+                health.append(line)
+            embed.add_field(name="Store Health", value="\n".join(health), inline=False)
+        
+        sends = metrics.DISCORD_SEND_SECONDS.labels()
+        embed.add_field(
+            name="Discord Sends",
+            value=(
+                f"{sends.count} sent, {sends.mean * 1000:.0f} ms avg, "
+                f"{metrics.DISCORD_SEND_FAILURES.labels().value:.0f} failed, "
+                f"{metrics.RATE_LIMIT_WAIT_SECONDS.labels().value:.1f}s rate-limit wait"
+            ),
+            inline=True
+        )
+        embed.add_field(name="Dedup Hits", value=f"{metrics.DEDUP_HITS.labels().value:.0f}", inline=True)
+        embed.add_field(
+            name="Event Loop Lag",
+            value=f"{self.bot.lag_monitor.last_lag * 1000:.0f} ms now, {self.bot.lag_monitor.max_lag * 1000:.0f} ms worst this cycle",
+            inline=True
+        )
         
         await interaction.response.send_message(embed=embed)
@@ -0,0 +1,41 @@
+import time
+from typing import Optional
+
+
+class CircuitBreaker:
+    # After `failure_threshold` failed checks in a row the store is left alone
+    # for `reset_timeout` seconds. The first check after that is a trial: if
+    # it fails too, the pause doubles (up to `max_reset_timeout`).
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 300.0, max_reset_timeout: float = 3600.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        
+        self.failures = 0
+        self.open_until: Optional[float] = None
+        self._timeout = reset_timeout
+    
+    @property
+    def state(self) -> str:
+        if self.open_until is None:
+            return "closed"
+        return "open" if time.time() < self.open_until else "half-open"
+    
+    def allow(self, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        return self.open_until is None or now >= self.open_until
+    
+    def record_success(self):
+        self.failures = 0
+        self.open_until = None
+        self._timeout = self.reset_timeout
+    
+    def record_failure(self, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        self.failures += 1
+        
+        if self.open_until is not None:
+            self._timeout = min(self._timeout * 2, self.max_reset_timeout)
+            self.open_until = now + self._timeout
+        elif self.failures >= self.failure_threshold:
+            self.open_until = now + self._timeout
@@ -0,0 +1,200 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import discord
+
+from . import metrics
+from .storage import GuildConfig
+
+
+@dataclass
+class DeliveryReport:
+    targets: int
+    messages_sent: int
+    failures: int
+    elapsed: float
+    rate_limit_wait: float
+    # (channel_id, message_id, offer keys) for every message that went out.
+    sent: list[tuple[int, int, list[tuple[str, str]]]] = field(default_factory=list)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self) -> float:
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                
+                delay = (1 - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+
+# Discord rejects a message with more than 10 embeds or more than 6000
+# characters across all of its embeds.
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+
+def pack_embeds(embeds: list[discord.Embed], batch: bool = True) -> list[list[discord.Embed]]:
+    if not batch:
+        return [[embed] for embed in embeds]
+    
+    messages: list[list[discord.Embed]] = []
+    current: list[discord.Embed] = []
+    current_chars = 0
+    
+    for embed in embeds:
+        size = len(embed)
+        if current and (len(current) >= MAX_EMBEDS_PER_MESSAGE or current_chars + size > MAX_EMBED_CHARS_PER_MESSAGE):
+            messages.append(current)
+            current = []
+            current_chars = 0
+        current.append(embed)
+        current_chars += size
+    
+    if current:
+        messages.append(current)
+    return messages
+
+
+def alert_content(config: GuildConfig) -> str:
+    ping_text = ""
+    if config.role_id:
+        ping_text = f"<@&{config.role_id}> "
+    return f"{ping_text}🎮 **FREE GAME ALERT!**"
+
+
+class DeliveryScheduler:
+    # Discord allows 50 requests per second per bot before the global limit
+    # kicks in; stay a little under it.
+    GLOBAL_RATE = 45.0
+    
+    def __init__(
+        self,
+        bot: discord.Client,
+        max_concurrency: int = 25,
+        global_rate: float = GLOBAL_RATE,
+        batch_embeds: bool = True
+    ):
+        self.bot = bot
+        self.batch_embeds = batch_embeds
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.global_bucket = TokenBucket(global_rate)
+        self.last_report: Optional[DeliveryReport] = None
+    
+    async def deliver(
+        self,
+        targets: list[GuildConfig],
+        embeds: list[discord.Embed],
+        keys: Optional[list[tuple[str, str]]] = None
+    ) -> DeliveryReport:
+        start = time.perf_counter()
+        messages = pack_embeds(embeds, batch=self.batch_embeds)
+        owners = {id(embed): key for embed, key in zip(embeds, keys or [])}
+        message_keys = [[owners[id(embed)] for embed in message if id(embed) in owners] for message in messages]
+        outcomes = await asyncio.gather(*(self._deliver_to(target, messages, message_keys) for target in targets))
+        
+        report = DeliveryReport(
+            targets=len(targets),
+            messages_sent=sum(len(sent) for sent, _, _ in outcomes),
+            failures=sum(failed for _, failed, _ in outcomes),
+            elapsed=time.perf_counter() - start,
+            rate_limit_wait=sum(waited for _, _, waited in outcomes),
+            sent=[message for sent, _, _ in outcomes for message in sent]
+        )
+        self.last_report = report
+        
+        print(
+            f"[delivery] {report.messages_sent} message(s) to {report.targets} guild(s) "
+            f"in {report.elapsed:.2f}s (rate-limit wait {report.rate_limit_wait:.2f}s, {report.failures} failed)"
+        )
+        return report
+    
+    async def _deliver_to(
+        self,
+        target: GuildConfig,
+        messages: list[list[discord.Embed]],
+        message_keys: list[list[tuple[str, str]]]
+    ) -> tuple[list[tuple[int, int, list[tuple[str, str]]]], int, float]:
+        channel = self.bot.get_channel(target.channel_id)
+        if not channel or not isinstance(channel, discord.TextChannel):
+            print(f"Could not find text channel {target.channel_id} for guild {target.guild_id}")
+            return [], 1, 0.0
+        
+        sent = []
+        waited = 0.0
+        content = alert_content(target)
+        
+        # Messages to one channel share a per-route bucket, so they go out one
+        # at a time; discord.py waits on that bucket's reset headers for us.
+        async with self.semaphore:
+            for embeds, keys in zip(messages, message_keys):
+                wait = await self.global_bucket.acquire()
+                if wait:
+                    metrics.RATE_LIMIT_WAIT_SECONDS.inc(wait)
+                    waited += wait
+                
+                start = time.perf_counter()
+                try:
+                    message = await channel.send(content=content, embeds=embeds)
+                    sent.append((channel.id, message.id, keys))
+                except discord.HTTPException as e:
+                    metrics.DISCORD_SEND_FAILURES.inc()
+                    print(f"Failed to deliver to channel {target.channel_id}: {e}")
+                    return sent, 1, waited
+                finally:
+                    metrics.DISCORD_SEND_SECONDS.observe(time.perf_counter() - start)
+        
+        return sent, 0, waited
+    
+    async def reply(self, channel_id: int, message_id: int, content: str) -> bool:
+        channel = self.bot.get_channel(channel_id)
+        if not channel or not isinstance(channel, discord.TextChannel):
+            return False
+        
+        await self._acquire()
+        reference = discord.MessageReference(message_id=message_id, channel_id=channel_id, fail_if_not_exists=False)
+        try:
+            await channel.send(content=content, reference=reference, mention_author=False)
+            return True
+        except discord.HTTPException as e:
+            print(f"Failed to send reminder to channel {channel_id}: {e}")
+            return False
+    
+    async def edit(self, channel_id: int, message_id: int, content: str) -> bool:
+        channel = self.bot.get_channel(channel_id)
+        if not channel or not isinstance(channel, discord.TextChannel):
+            return False
+        
+        # Only the text changes; the game embeds stay as they were.
+        await self._acquire()
+        try:
+            await channel.get_partial_message(message_id).edit(content=content)
+            return True
+        except discord.NotFound:
+            return True
+        except discord.HTTPException as e:
+            print(f"Failed to edit alert {message_id} in channel {channel_id}: {e}")
+            return False
+    
+    async def _acquire(self):
+        async with self.semaphore:
+            wait = await self.global_bucket.acquire()
+        if wait:
+            metrics.RATE_LIMIT_WAIT_SECONDS.inc(wait)
@@ -0,0 +1,88 @@
+import heapq
+import itertools
+import time
+from calendar import timegm
+from typing import Optional
+
+from .stores.base import FreeGame
+
+REMIND = "remind"
+EXPIRE = "expire"
+
+
+def _epoch(game: FreeGame) -> float:
+    return float(timegm(game.end_date.utctimetuple()))
+
+
+class ExpiryIndex:
+    # A min-heap of (fire_at, seq, kind, key). Changing an offer's end date
+    # just pushes new entries; entries that no longer match the offer's
+    # current end date are dropped when they reach the top.
+    def __init__(self, reminder_hours: float = 24.0):
+        self.reminder_seconds = reminder_hours * 3600
+        self.games: dict[tuple[str, str], FreeGame] = {}
+        self._ends: dict[tuple[str, str], float] = {}
+        self._heap: list[tuple[float, int, str, tuple[str, str]]] = []
+        self._seq = itertools.count()
+    
+    def __len__(self) -> int:
+        return len(self._ends)
+    
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        return key in self._ends
+    
+    def add(self, game: FreeGame, posted_at: Optional[float] = None, reminded: bool = False):
+        if game.end_date is None:
+            return
+        
+        end = _epoch(game)
+        self.games[game.key] = game
+        self._ends[game.key] = end
+        heapq.heappush(self._heap, (end, next(self._seq), EXPIRE, game.key))
+        
+        # Only remind about offers whose alert went out before the reminder
+        # window opened; otherwise the reminder would just repeat the alert.
+        posted_at = time.time() if posted_at is None else posted_at
+        remind_at = end - self.reminder_seconds
+        if self.reminder_seconds and not reminded and remind_at > posted_at:
+            heapq.heappush(self._heap, (remind_at, next(self._seq), REMIND, game.key))
+    
+    def reschedule(self, game: FreeGame) -> bool:
+        # Stores sometimes extend a giveaway, and an offer can be announced
+        # before its end date is known (Steam's details can miss their time
+        # budget); follow the new end date either way.
+        if game.end_date is None:
+            return False
+        end = self._ends.get(game.key)
+        if end is None:
+            # The alert never said when the offer ends, so a reminder would
+            # not just repeat it.
+            self.add(game, posted_at=0.0)
+            return True
+        if _epoch(game) == end:
+            return False
+        self.add(game)
+        return True
+    
+    def next_due(self) -> Optional[float]:
+        return self._heap[0][0] if self._heap else None
+    
+    def due(self, now: Optional[float] = None) -> list[tuple[str, FreeGame]]:
+        now = time.time() if now is None else now
+        events = []
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, _, kind, key = heapq.heappop(self._heap)
+            end = self._ends.get(key)
+            if end is None:
+                continue
+            if kind == EXPIRE and fire_at != end:
+                continue
+            if kind == REMIND and fire_at != end - self.reminder_seconds:
+                continue
+            
+            game = self.games[key]
+            if kind == EXPIRE:
+                del self._ends[key]
+                del self.games[key]
+            events.append((kind, game))
+        return events
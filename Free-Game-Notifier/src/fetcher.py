@@ -0,0 +1,93 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from . import metrics
+from .loop_monitor import LoopLagMonitor
+from .stores.base import BaseStore, FreeGame
+
+
+@dataclass
+class StoreResult:
+    store: BaseStore
+    games: list[FreeGame] = field(default_factory=list)
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    timed_out: bool = False
+    # Set when the store was not asked because its circuit breaker is open.
+    circuit_open: bool = False
+    # Set when the check failed and `games` is the last good result instead.
+    stale: bool = False
+    # Epoch time the games were actually read from the store.
+    fetched_at: Optional[float] = None
+    
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.timed_out
+
+
+async def _fetch_store(store: BaseStore) -> StoreResult:
+    if not store.breaker.allow():
+        retry_at = datetime.utcfromtimestamp(store.breaker.open_until)
+        return StoreResult(store=store, error=f"circuit open until {retry_at:%H:%M:%S} UTC", circuit_open=True)
+    
+    result = await _run_store(store)
+    
+    metrics.STORE_FETCH_SECONDS.labels(store.key).observe(result.elapsed)
+    if result.ok:
+        store.breaker.record_success()
+        metrics.STORE_OFFERS.labels(store.key).set(len(result.games))
+    else:
+        store.breaker.record_failure()
+        metrics.STORE_FAILURES.labels(store.key, "timeout" if result.timed_out else "error").inc()
+    metrics.STORE_CIRCUIT_OPEN.labels(store.key).set(0 if store.breaker.open_until is None else 1)
+    return result
+
+
+async def _run_store(store: BaseStore) -> StoreResult:
+    start = time.perf_counter()
+    store.deadline = time.monotonic() + store.timeout
+    
+    try:
+        games = await asyncio.wait_for(store.get_free_games(), timeout=store.timeout)
+        return StoreResult(store=store, games=games, elapsed=time.perf_counter() - start, fetched_at=time.time())
+    except asyncio.TimeoutError:
+        return StoreResult(
+            store=store,
+            elapsed=time.perf_counter() - start,
+            error=f"timed out after {store.timeout:.1f}s",
+            timed_out=True
+        )
+    except Exception as e:
+        return StoreResult(store=store, elapsed=time.perf_counter() - start, error=str(e))
+    finally:
+        store.deadline = None
+
+
+async def fetch_all_stores(stores: list[BaseStore], lag_monitor: Optional[LoopLagMonitor] = None) -> list[StoreResult]:
+    start = time.perf_counter()
+    if lag_monitor:
+        lag_monitor.reset()
+    results = await asyncio.gather(*(_fetch_store(store) for store in stores))
+    
+    for result in results:
+        if result.ok:
+            print(f"[fetch] {result.store.name}: {len(result.games)} game(s) in {result.elapsed:.2f}s")
+        else:
+            print(f"[fetch] {result.store.name}: {result.error} ({result.elapsed:.2f}s)")
+    elapsed = time.perf_counter() - start
+    if lag_monitor:
+        print(f"[fetch] Cycle finished in {elapsed:.2f}s (max event loop lag {lag_monitor.max_lag * 1000:.0f} ms)")
+    else:
+        print(f"[fetch] Cycle finished in {elapsed:.2f}s")
+    
+    return list(results)
+
+
+def collect_games(results: list[StoreResult]) -> list[FreeGame]:
+    games = []
+    for result in results:
+        games.extend(result.games)
+    return games
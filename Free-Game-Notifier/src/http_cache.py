@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import urlencode
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    body_hash: str
+    size: int
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    last_used: float = 0.0
+
+
+class HttpCache:
+    INDEX_FILE = "index.json"
+    
+    def __init__(self, directory: str, max_bytes: int = 50 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        
+        self.entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._parsed: dict[str, tuple[str, Any]] = {}
+        self.total_bytes = 0
+        # The index is written once per check cycle (see HttpClient.save_cache)
+        # rather than after every response.
+        self.dirty = False
+        
+        self.not_modified_hits = 0
+        self.unchanged_hits = 0
+        self.misses = 0
+    
+    def load(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        index_path = self.directory / self.INDEX_FILE
+        if not index_path.exists():
+            return
+        
+        try:
+            raw = json.loads(index_path.read_text())
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable HTTP cache index: {e}")
+            return
+        
+        for key, data in sorted(raw.items(), key=lambda item: item[1].get("last_used", 0)):
+            entry = CacheEntry(**data)
+            if not self._body_path(key).exists():
+                continue
+            self.entries[key] = entry
+            self.total_bytes += entry.size
+        
+        print(f"Loaded {len(self.entries)} cached HTTP response(s) ({self.total_bytes / 1024:.0f} KiB)")
+    
+    @staticmethod
+    def key_for(url: str, params: Optional[dict] = None) -> str:
+        if params:
+            url = f"{url}?{urlencode(sorted(params.items()))}"
+        return hashlib.sha1(url.encode()).hexdigest()
+    
+    @staticmethod
+    def hash_body(body: bytes) -> str:
+        return hashlib.sha256(body).hexdigest()
+    
+    def validators(self, key: str) -> dict[str, str]:
+        entry = self.entries.get(key)
+        if not entry:
+            return {}
+        
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+    
+    def read_body(self, key: str) -> Optional[bytes]:
+        try:
+            return self._body_path(key).read_bytes()
+        except OSError:
+            return None
+    
+    def parsed(self, key: str, body_hash: str) -> Optional[Any]:
+        cached = self._parsed.get(key)
+        if cached and cached[0] == body_hash:
+            return cached[1]
+        return None
+    
+    def remember_parsed(self, key: str, body_hash: str, result: Any):
+        if key in self.entries:
+            self._parsed[key] = (body_hash, result)
+    
+    def touch(self, key: str):
+        entry = self.entries.get(key)
+        if entry:
+            entry.last_used = time.time()
+            self.entries.move_to_end(key)
+    
+    def needs_body(self, key: str, body: bytes, body_hash: str) -> bool:
+        # Whether store() will keep a body that is not on disk yet; the caller
+        # writes it with write_body(), off the event loop.
+        if len(body) > self.max_bytes:
+            return False
+        previous = self.entries.get(key)
+        return not previous or previous.body_hash != body_hash
+    
+    def write_body(self, key: str, body: bytes):
+        self._write_atomic(self._body_path(key), body)
+    
+    def store(self, key: str, url: str, headers, body: bytes, body_hash: str):
+        previous = self.entries.pop(key, None)
+        if previous:
+            self.total_bytes -= previous.size
+        
+        if len(body) > self.max_bytes:
+            self.discard(key)
+            return
+        
+        entry = CacheEntry(
+            url=url,
+            body_hash=body_hash,
+            size=len(body),
+            etag=headers.get("ETag"),
+            last_modified=headers.get("Last-Modified"),
+            last_used=time.time()
+        )
+        
+        self.entries[key] = entry
+        self.total_bytes += entry.size
+        self.dirty = True
+        self._evict()
+    
+    def discard(self, key: str):
+        entry = self.entries.pop(key, None)
+        self._parsed.pop(key, None)
+        if entry:
+            self.total_bytes -= entry.size
+            self.dirty = True
+        try:
+            self._body_path(key).unlink()
+        except OSError:
+            pass
+    
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self.entries:
+            oldest_key = next(iter(self.entries))
+            self.discard(oldest_key)
+    
+    def _body_path(self, key: str) -> Path:
+        return self.directory / f"{key}.body"
+    
+    def dump_index(self) -> bytes:
+        self.dirty = False
+        index = {key: asdict(entry) for key, entry in self.entries.items()}
+        return json.dumps(index).encode()
+    
+    def write_index(self, data: bytes):
+        self._write_atomic(self.directory / self.INDEX_FILE, data)
+    
+    def _write_atomic(self, path: Path, data: bytes):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
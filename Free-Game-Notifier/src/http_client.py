@@ -0,0 +1,302 @@
+import asyncio
+import random
+import time
+import aiohttp
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional
+
+from . import metrics
+from .http_cache import HttpCache
+
+
+def _accept_encoding() -> str:
+    encodings = "gzip, deflate"
+    try:
+        import brotli  # noqa: F401
+        encodings += ", br"
+    except ImportError:
+        pass
+    return encodings
+
+
+class HttpStatusError(Exception):
+    def __init__(self, status: int, url: str, retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {status} from {url}")
+        self.status = status
+        self.url = url
+        self.retry_after = retry_after
+
+
+def _retry_after(response: aiohttp.ClientResponse) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def _status_error(response: aiohttp.ClientResponse, url: str) -> HttpStatusError:
+    return HttpStatusError(response.status, url, _retry_after(response))
+
+
+class HttpClient:
+    # Rate limiting and transient server errors; anything else will not get
+    # better by asking again.
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+    
+    def __init__(
+        self,
+        cache: Optional[HttpCache] = None,
+        limit: int = 100,
+        limit_per_host: int = 8,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 60.0,
+        timeout: float = 30.0,
+        retries: int = 2,
+        retry_base_delay: float = 0.5,
+        retry_max_delay: float = 8.0,
+        max_retry_after: float = 30.0
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.cache = cache
+        self.retries = retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.max_retry_after = max_retry_after
+        
+        self._session: Optional[aiohttp.ClientSession] = None
+        
+        self.requests = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+    
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            raise RuntimeError("HTTP client is not open; call open() first")
+        return self._session
+    
+    @property
+    def is_open(self) -> bool:
+        return self._session is not None and not self._session.closed
+    
+    async def open(self):
+        if self.is_open:
+            return
+        
+        if self.cache:
+            self.cache.load()
+        
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self._on_request_start)
+        trace_config.on_connection_create_end.append(self._on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+        
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout
+        )
+        
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"Accept-Encoding": _accept_encoding()},
+            auto_decompress=True,
+            trace_configs=[trace_config]
+        )
+    
+    async def close(self):
+        if not self.is_open:
+            return
+        
+        await self.save_cache()
+        await self._session.close()
+        self._session = None
+        # Give the connector a moment to finish closing TLS transports.
+        await asyncio.sleep(0.25)
+        print(f"HTTP client closed ({self.connections_reused} reused / {self.connections_created} new connections)")
+    
+    async def save_cache(self):
+        # Entries are serialized on the loop, where they are changed, and
+        # written out in a thread.
+        if self.cache and self.cache.dirty:
+            await asyncio.to_thread(self.cache.write_index, self.cache.dump_index())
+    
+    async def get_parsed(
+        self,
+        url: str,
+        parse: Callable[[bytes], Awaitable[Any]],
+        params: Optional[dict] = None,
+        headers: Optional[dict] = None,
+        store: str = "other",
+        deadline: Optional[float] = None
+    ) -> Any:
+        # Only GETs come through here, so every attempt is safe to repeat.
+        # `deadline` (a time.monotonic() value) is when the caller gives up;
+        # a retry that could not start before then is not attempted.
+        attempt = 0
+        while True:
+            try:
+                return await self._get_parsed_once(url, parse, params, headers, store)
+            except HttpStatusError as e:
+                if e.status not in self.RETRY_STATUSES or attempt >= self.retries:
+                    raise
+                delay = self._retry_delay(attempt, e.retry_after, deadline)
+                if delay is None:
+                    raise
+                reason = f"HTTP {e.status}"
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+                if attempt >= self.retries:
+                    raise
+                delay = self._retry_delay(attempt, None, deadline)
+                if delay is None:
+                    raise
+                reason = type(e).__name__
+            
+            attempt += 1
+            metrics.HTTP_RETRIES.labels(store).inc()
+            print(f"[http] {store}: {reason}, retrying in {delay:.1f}s (attempt {attempt + 1}/{self.retries + 1})")
+            await asyncio.sleep(delay)
+    
+    def _retry_delay(self, attempt: int, retry_after: Optional[float], deadline: Optional[float] = None) -> Optional[float]:
+        if retry_after is not None:
+            # A server asking for a longer pause than we are willing to wait
+            # gets the failure reported instead; the circuit breaker and the
+            # scheduler take it from there.
+            if retry_after > self.max_retry_after:
+                return None
+            delay = retry_after + random.uniform(0, self.retry_base_delay)
+        else:
+            # Full jitter keeps several stores (or bots) from retrying in step.
+            delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+        # Sleeping past the caller's deadline would only turn the real error
+        # into a timeout.
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return None
+        return delay
+    
+    async def _get_parsed_once(
+        self,
+        url: str,
+        parse: Callable[[bytes], Awaitable[Any]],
+        params: Optional[dict],
+        headers: Optional[dict],
+        store: str
+    ) -> Any:
+        cache = self.cache
+        if cache is None:
+            start = time.perf_counter()
+            async with self.session.get(url, params=params, headers=headers) as response:
+                if response.status != 200:
+                    self._observe_response(store, response.status, start)
+                    raise _status_error(response, url)
+                body = await response.read()
+            self._observe_response(store, 200, start, len(body))
+            return await self._parse(parse, body, store)
+        
+        key = cache.key_for(url, params)
+        request_headers = dict(headers or {})
+        request_headers.update(cache.validators(key))
+        
+        start = time.perf_counter()
+        async with self.session.get(url, params=params, headers=request_headers) as response:
+            if response.status == 304 and key in cache.entries:
+                self._observe_response(store, 304, start)
+                entry = cache.entries[key]
+                cache.touch(key)
+                cache.not_modified_hits += 1
+                metrics.HTTP_CACHE_HITS.labels(store, "not_modified").inc()
+                
+                result = cache.parsed(key, entry.body_hash)
+                if result is not None:
+                    return result
+                
+                body = await asyncio.to_thread(cache.read_body, key)
+                if body is not None:
+                    result = await self._parse(parse, body, store)
+                    cache.remember_parsed(key, entry.body_hash, result)
+                    return result
+                
+                # The cached body went missing, so ask again without validators.
+                cache.discard(key)
+                return await self._get_parsed_once(url, parse, params, headers, store)
+            
+            if response.status != 200:
+                self._observe_response(store, response.status, start)
+                raise _status_error(response, url)
+            
+            body = await response.read()
+            response_headers = response.headers
+        self._observe_response(store, 200, start, len(body))
+        
+        body_hash = cache.hash_body(body)
+        previous = cache.entries.get(key)
+        result = None
+        if previous and previous.body_hash == body_hash:
+            result = cache.parsed(key, body_hash)
+        
+        if result is not None:
+            cache.unchanged_hits += 1
+            metrics.HTTP_CACHE_HITS.labels(store, "unchanged").inc()
+        else:
+            cache.misses += 1
+            result = await self._parse(parse, body, store)
+        
+        if cache.needs_body(key, body, body_hash):
+            await asyncio.to_thread(cache.write_body, key, body)
+        cache.store(key, url, response_headers, body, body_hash)
+        cache.remember_parsed(key, body_hash, result)
+        return result
+    
+    async def _parse(self, parse: Callable[[bytes], Awaitable[Any]], body: bytes, store: str) -> Any:
+        start = time.perf_counter()
+        try:
+            return await parse(body)
+        finally:
+            metrics.PARSE_SECONDS.labels(store).observe(time.perf_counter() - start)
+    
+    def _observe_response(self, store: str, status: int, start: float, size: int = 0):
+        metrics.HTTP_REQUEST_SECONDS.labels(store).observe(time.perf_counter() - start)
+        metrics.HTTP_RESPONSES.labels(store, str(status)).inc()
+        if size:
+            metrics.HTTP_RESPONSE_BYTES.labels(store).inc(size)
+    
+    def stats(self) -> dict[str, int]:
+        stats = {
+            "requests": self.requests,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused
+        }
+        if self.cache:
+            stats.update({
+                "cache_not_modified": self.cache.not_modified_hits,
+                "cache_unchanged": self.cache.unchanged_hits,
+                "cache_misses": self.cache.misses
+            })
+        return stats
+    
+    async def _on_request_start(self, session, context, params):
+        self.requests += 1
+    
+    async def _on_connection_create_end(self, session, context, params):
+        self.connections_created += 1
+    
+    async def _on_connection_reuseconn(self, session, context, params):
+        self.connections_reused += 1
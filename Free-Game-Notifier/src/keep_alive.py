@@ -1 +1,40 @@
+from typing import Optional
 
+from aiohttp import web
+
+from .metrics import REGISTRY, Registry
+
+
+class MetricsServer:
+    # Answers uptime pings on / and serves Prometheus text format on /metrics.
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+    
+    def __init__(self, host: str = "127.0.0.1", port: int = 9108, registry: Registry = REGISTRY):
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self._runner: Optional[web.AppRunner] = None
+    
+    async def start(self):
+        if self._runner is not None:
+            return
+        
+        app = web.Application()
+        app.router.add_get("/", self._alive)
+        app.router.add_get("/metrics", self._metrics)
+        
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        print(f"Metrics available at http://{self.host}:{self.port}/metrics")
+    
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+    
+    async def _alive(self, request: web.Request) -> web.Response:
+        return web.Response(text="Free Games Bot is running")
+    
+    async def _metrics(self, request: web.Request) -> web.Response:
+        return web.Response(body=self.registry.render().encode(), headers={"Content-Type": self.CONTENT_TYPE})
@@ -0,0 +1,39 @@
+import asyncio
+import time
+from typing import Optional
+
+from . import metrics
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+    
+    def reset(self) -> float:
+        max_lag = self.max_lag
+        self.max_lag = 0.0
+        return max_lag
+    
+    async def _run(self):
+        # A sleep that overshoots means some other callback held the loop for
+        # that long; that is the delay heartbeats and interactions would see.
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - start - self.interval)
+            self.last_lag = lag
+            metrics.EVENT_LOOP_LAG_SECONDS.observe(lag)
+            if lag > self.max_lag:
+                self.max_lag = lag
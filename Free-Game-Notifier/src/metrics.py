@@ -0,0 +1,243 @@
+import math
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Optional
+
+
+# Recording is a dict lookup and a couple of additions; text is only built
+# when something scrapes the endpoint, so an idle registry costs nothing.
+class Registry:
+    def __init__(self):
+        self.metrics: list["_Metric"] = []
+    
+    def register(self, metric: "_Metric"):
+        self.metrics.append(metric)
+    
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        lines.append("")
+        return "\n".join(lines)
+
+
+REGISTRY = Registry()
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _CounterValue:
+    __slots__ = ("value",)
+    
+    def __init__(self):
+        self.value = 0.0
+    
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class _GaugeValue:
+    __slots__ = ("value", "function")
+    
+    def __init__(self):
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+    
+    def set(self, value: float):
+        self.value = value
+    
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+    
+    def set_function(self, function: Callable[[], float]):
+        # Read at scrape time instead of being pushed on every change.
+        self.function = function
+    
+    def get(self) -> float:
+        return self.function() if self.function else self.value
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum", "count")
+    
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+    
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+class _Metric(ABC):
+    kind = ""
+    
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), registry: Registry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+        registry.register(self)
+    
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            child = self._children[values] = self._new_child()
+        return child
+    
+    @abstractmethod
+    def _new_child(self):
+        pass
+    
+    @abstractmethod
+    def samples(self) -> list[str]:
+        pass
+
+
+class Counter(_Metric):
+    kind = "counter"
+    
+    def _new_child(self) -> _CounterValue:
+        return _CounterValue()
+    
+    def inc(self, amount: float = 1.0):
+        self._children[()].inc(amount)
+    
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+            for values, child in self._children.items()
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+    
+    def _new_child(self) -> _GaugeValue:
+        return _GaugeValue()
+    
+    def set(self, value: float):
+        self._children[()].set(value)
+    
+    def set_function(self, function: Callable[[], float]):
+        self._children[()].set_function(function)
+    
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.get())}"
+            for values, child in self._children.items()
+        ]
+
+
+# Seconds; covers everything from a cached parse to a slow store page.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+        registry: Registry = REGISTRY
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+    
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+    
+    def observe(self, value: float):
+        self._children[()].observe(value)
+    
+    def samples(self) -> list[str]:
+        lines = []
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), child.counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "freegames_http_request_seconds",
+    "Time from sending a store request to having its full response body",
+    ("store",)
+)
+HTTP_RESPONSES = Counter("freegames_http_responses_total", "Store responses by HTTP status", ("store", "status"))
+HTTP_RESPONSE_BYTES = Counter("freegames_http_response_bytes_total", "Store response body bytes downloaded", ("store",))
+HTTP_CACHE_HITS = Counter(
+    "freegames_http_cache_hits_total",
+    "Store responses served from the HTTP cache, by 304 or by an unchanged body",
+    ("store", "kind")
+)
+HTTP_RETRIES = Counter("freegames_http_retries_total", "Store requests retried after a transient failure", ("store",))
+PARSE_SECONDS = Histogram("freegames_parse_seconds", "Time spent parsing a store response", ("store",))
+
+STORE_FETCH_SECONDS = Histogram(
+    "freegames_store_fetch_seconds",
+    "Time to fetch all free offers from a store, including every page",
+    ("store",)
+)
+STORE_OFFERS = Gauge("freegames_store_offers", "Free offers found on the latest check of a store", ("store",))
+STORE_FAILURES = Counter("freegames_store_failures_total", "Store checks that failed or timed out", ("store", "reason"))
+STORE_STALE_SERVED = Counter(
+    "freegames_store_stale_served_total",
+    "Failed store checks answered with the store's last good result",
+    ("store",)
+)
+STORE_CIRCUIT_OPEN = Gauge("freegames_store_circuit_open", "1 while a store's circuit breaker is holding off checks", ("store",))
+
+DEDUP_HITS = Counter("freegames_dedup_hits_total", "Offers skipped because they were already posted")
+NEW_OFFERS = Counter("freegames_new_offers_total", "Offers posted for the first time")
+
+DISCORD_SEND_SECONDS = Histogram("freegames_discord_send_seconds", "Latency of one Discord channel send")
+DISCORD_SEND_FAILURES = Counter("freegames_discord_send_failures_total", "Discord sends that raised an HTTP error")
+RATE_LIMIT_WAIT_SECONDS = Counter(
+    "freegames_rate_limit_wait_seconds_total",
+    "Time deliveries spent waiting on the global send rate limiter"
+)
+
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "freegames_event_loop_lag_seconds",
+    "How late the event loop ran a periodic timer",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+)
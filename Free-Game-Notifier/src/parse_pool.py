@@ -0,0 +1,48 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+
+class ParsePool:
+    MODES = ("inline", "thread", "process")
+    
+    def __init__(self, mode: str = "thread", workers: Optional[int] = None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown parse executor {mode!r}; expected one of {', '.join(self.MODES)}")
+        
+        self.mode = mode
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self._executor: Optional[Executor] = None
+    
+    def start(self):
+        if self._executor is not None or self.mode == "inline":
+            return
+        
+        if self.mode == "process":
+            # Forking a process that already runs an event loop and helper
+            # threads is unsafe, so workers start from a clean interpreter.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="parse")
+    
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        # In process mode `func` and its arguments are pickled, so stores pass
+        # module-level parse functions and raw payloads rather than bound
+        # methods or parsed trees.
+        if self.mode == "inline":
+            return func(*args)
+        
+        self.start()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args))
@@ -0,0 +1,153 @@
+import os
+from datetime import datetime
+from typing import Optional
+
+from . import metrics
+from .circuit_breaker import CircuitBreaker
+from .fetcher import collect_games
+from .http_cache import HttpCache
+from .http_client import HttpClient
+from .loop_monitor import LoopLagMonitor
+from .parse_pool import ParsePool
+from .scheduler import CheckScheduler
+from .snapshot import OfferSnapshot
+from .storage import PostedGameStore, StoreResultStore
+from .stores import create_stores
+from .stores.base import BaseStore, FreeGame
+
+
+class CheckPipeline:
+    # Everything between the stores and "these offers are new": the HTTP
+    # client, parsing, per-store scheduling, the offer snapshot and dedup.
+    # The bot runs it in-process; the fetcher worker runs it on its own and
+    # publishes what it finds to gateway processes.
+    def __init__(self, database_path: str):
+        self.store_http = HttpClient(
+            cache=HttpCache(
+                os.getenv("HTTP_CACHE_DIR", ".cache/http"),
+                max_bytes=int(float(os.getenv("HTTP_CACHE_MAX_MB", "50")) * 1024 * 1024)
+            ),
+            limit_per_host=int(os.getenv("HTTP_LIMIT_PER_HOST", "8")),
+            dns_cache_ttl=int(os.getenv("HTTP_DNS_CACHE_TTL", "300")),
+            retries=int(os.getenv("HTTP_RETRIES", "2"))
+        )
+        
+        parse_workers = os.getenv("PARSE_WORKERS")
+        self.parse_pool = ParsePool(
+            os.getenv("PARSE_EXECUTOR", "thread"),
+            workers=int(parse_workers) if parse_workers else None
+        )
+        self.lag_monitor = LoopLagMonitor()
+        
+        # ENABLED_STORES picks stores by key (e.g. "epic,steam"); only those
+        # store modules are ever imported.
+        enabled_stores = os.getenv("ENABLED_STORES")
+        self.stores = create_stores(
+            self.store_http,
+            self.parse_pool,
+            [key.strip() for key in enabled_stores.split(",") if key.strip()] if enabled_stores else None
+        )
+        self._configure_stores()
+        
+        self.posted_store = PostedGameStore(
+            database_path,
+            retention_days=float(os.getenv("OFFER_RETENTION_DAYS", "14"))
+        )
+        self.store_results = StoreResultStore(database_path)
+        
+        self.snapshot = OfferSnapshot(
+            self.stores,
+            ttl=float(os.getenv("SNAPSHOT_TTL", "60")),
+            lag_monitor=self.lag_monitor,
+            result_store=self.store_results
+        )
+        self.scheduler = CheckScheduler(
+            min_interval=float(os.getenv("CHECK_MIN_INTERVAL", "120")),
+            base_interval=float(os.getenv("CHECK_BASE_INTERVAL", "3600")),
+            max_interval=float(os.getenv("CHECK_MAX_INTERVAL", "10800"))
+        )
+    
+    def _configure_stores(self):
+        default_timeout = os.getenv("STORE_TIMEOUT")
+        failure_threshold = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+        reset_timeout = float(os.getenv("CIRCUIT_RESET_SECONDS", "300"))
+        for store in self.stores:
+            timeout = os.getenv(f"{store.key.upper()}_TIMEOUT") or default_timeout
+            if timeout:
+                store.timeout = float(timeout)
+            store.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        
+        # EPIC_REGIONS lists country[:locale] pairs, e.g. "US:en-US,GB:en-GB,DE:de-DE".
+        epic_regions = os.getenv("EPIC_REGIONS")
+        if epic_regions:
+            regions = []
+            for entry in epic_regions.split(","):
+                country, _, locale = entry.strip().partition(":")
+                if country:
+                    regions.append((country.upper(), locale or "en-US"))
+            for store in self.stores:
+                if store.key == "epic" and regions:
+                    store.regions = regions
+        
+        steam_parser = os.getenv("STEAM_PARSER")
+        steam_page_concurrency = os.getenv("STEAM_PAGE_CONCURRENCY")
+        steam_max_pages = os.getenv("STEAM_MAX_PAGES")
+        steam_details_ttl = os.getenv("STEAM_DETAILS_TTL")
+        steam_details_concurrency = os.getenv("STEAM_DETAILS_CONCURRENCY")
+        steam_details_budget = os.getenv("STEAM_DETAILS_BUDGET")
+        for store in self.stores:
+            if store.key != "steam":
+                continue
+            if steam_parser:
+                store.parser_backend = steam_parser
+            if steam_page_concurrency:
+                store.page_concurrency = int(steam_page_concurrency)
+            if steam_max_pages:
+                store.max_pages = int(steam_max_pages)
+            if steam_details_ttl:
+                store.details.ttl = float(steam_details_ttl)
+            if steam_details_concurrency:
+                store.details.concurrency = int(steam_details_concurrency)
+            if steam_details_budget:
+                store.details.budget = float(steam_details_budget)
+    
+    async def open(self):
+        self.posted_store.open()
+        self.store_results.open()
+        self.snapshot.restore()
+        await self.store_http.open()
+        self.parse_pool.start()
+        self.lag_monitor.start()
+    
+    async def close(self):
+        await self.store_http.close()
+        self.lag_monitor.stop()
+        self.parse_pool.shutdown()
+        self.posted_store.close()
+        self.store_results.close()
+    
+    def due_stores(self) -> list[BaseStore]:
+        # Each store has its own next check time; callers only wake up to
+        # see whose turn it is.
+        return [store for store in self.stores if self.scheduler.is_due(store.key)]
+    
+    async def check(self, stores: Optional[list[BaseStore]] = None) -> tuple[list[FreeGame], list[FreeGame]]:
+        # Returns every offer that is free right now and the ones among them
+        # that have not been announced yet (which are marked as posted).
+        results = await self.snapshot.refresh(stores)
+        await self.store_http.save_cache()
+        for result in results:
+            next_check = self.scheduler.record(result)
+            print(f"[schedule] Next {result.store.name} check at {datetime.utcfromtimestamp(next_check):%Y-%m-%d %H:%M:%S} UTC")
+        # A store can keep listing an offer for a while after its end date;
+        # those must not be announced again once the expiry loop forgot them.
+        now = datetime.utcnow()
+        all_free_games = [game for game in collect_games(results) if game.end_date is None or game.end_date > now]
+        
+        new_games = self.posted_store.filter_new(all_free_games)
+        metrics.DEDUP_HITS.inc(len(all_free_games) - len(new_games))
+        metrics.NEW_OFFERS.inc(len(new_games))
+        self.posted_store.mark_posted(new_games)
+        self.posted_store.prune_expired()
+        
+        return all_free_games, new_games
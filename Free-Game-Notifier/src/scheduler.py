@@ -0,0 +1,136 @@
+import random
+import statistics
+import time
+from calendar import timegm
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from .fetcher import StoreResult
+
+
+def _epoch(value: datetime) -> float:
+    return float(timegm(value.utctimetuple()))
+
+
+@dataclass
+class StoreSchedule:
+    next_check: float = 0.0
+    interval: float = 0.0
+    signature: Optional[frozenset] = None
+    # The store rotation the next check is aimed at, if any.
+    rotation_at: Optional[float] = None
+    rotations: deque = field(default_factory=lambda: deque(maxlen=8))
+
+
+class CheckScheduler:
+    def __init__(
+        self,
+        min_interval: float = 120.0,
+        base_interval: float = 3600.0,
+        max_interval: float = 3 * 3600.0,
+        rotation_window: float = 1800.0,
+        jitter: float = 0.1
+    ):
+        self.min_interval = min_interval
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.rotation_window = rotation_window
+        self.jitter = jitter
+        self.schedules: dict[str, StoreSchedule] = {}
+    
+    def schedule_for(self, store_key: str) -> StoreSchedule:
+        schedule = self.schedules.get(store_key)
+        if schedule is None:
+            schedule = self.schedules[store_key] = StoreSchedule(interval=self.base_interval)
+        return schedule
+    
+    def is_due(self, store_key: str, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        return self.schedule_for(store_key).next_check <= now
+    
+    def next_check(self, store_key: str) -> float:
+        return self.schedule_for(store_key).next_check
+    
+    def postpone(self, store_key: str, now: Optional[float] = None) -> float:
+        # For a check that failed as a whole rather than per store: try again
+        # soon, but not on every wake-up.
+        now = time.time() if now is None else now
+        schedule = self.schedule_for(store_key)
+        schedule.next_check = max(schedule.next_check, now + self._jittered(self.min_interval))
+        return schedule.next_check
+    
+    def record(self, result: StoreResult, now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        schedule = self.schedule_for(result.store.key)
+        
+        if not result.ok:
+            # No point checking again before the store's circuit breaker lets
+            # the request through.
+            schedule.next_check = max(now + self._jittered(self.min_interval), result.store.breaker.open_until or 0.0)
+            return schedule.next_check
+        
+        signature = frozenset(game.key for game in result.games)
+        changed = schedule.signature is not None and signature != schedule.signature
+        first_check = schedule.signature is None
+        schedule.signature = signature
+        
+        if changed:
+            schedule.rotations.append(now)
+            schedule.rotation_at = None
+            schedule.interval = self.base_interval
+        elif not first_check:
+            schedule.interval = min(schedule.interval * 2, self.max_interval)
+        
+        # Right after an expected rotation the store may lag behind by a few
+        # minutes, so keep polling closely until the change shows up.
+        if schedule.rotation_at is not None and not changed:
+            if now - schedule.rotation_at < self.rotation_window:
+                schedule.next_check = now + self._jittered(self.min_interval)
+                return schedule.next_check
+            schedule.rotation_at = None
+        
+        delay = self._jittered(schedule.interval)
+        boundary = self._next_boundary(result, schedule, now)
+        if boundary is not None and boundary - now < delay:
+            schedule.rotation_at = boundary
+            # Land just after the boundary; only ever add jitter here so the
+            # check can't fire before the rotation.
+            schedule.next_check = boundary + random.uniform(30.0, 90.0)
+        else:
+            schedule.next_check = now + max(self.min_interval, delay)
+        
+        return schedule.next_check
+    
+    def _next_boundary(self, result: StoreResult, schedule: StoreSchedule, now: float) -> Optional[float]:
+        boundaries = []
+        for game in result.games:
+            if game.end_date:
+                boundaries.append(_epoch(game.end_date))
+        for game in result.store.upcoming:
+            if game.start_date:
+                boundaries.append(_epoch(game.start_date))
+        
+        predicted = self._predicted_rotation(schedule)
+        if predicted is not None:
+            boundaries.append(predicted)
+        
+        upcoming = [boundary for boundary in boundaries if boundary > now]
+        return min(upcoming) if upcoming else None
+    
+    def _predicted_rotation(self, schedule: StoreSchedule) -> Optional[float]:
+        # With no dates to go on, stores that rotate on a fixed cadence still
+        # give it away through the spacing of the changes we have seen.
+        if len(schedule.rotations) < 3:
+            return None
+        
+        rotations = list(schedule.rotations)
+        gaps = [later - earlier for earlier, later in zip(rotations, rotations[1:])]
+        period = statistics.median(gaps)
+        if period < self.base_interval:
+            return None
+        return rotations[-1] + period
+    
+    def _jittered(self, delay: float) -> float:
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
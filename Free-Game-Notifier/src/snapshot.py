@@ -0,0 +1,159 @@
+import asyncio
+import time
+from dataclasses import replace
+from datetime import datetime
+from typing import Optional
+
+from . import metrics
+from .fetcher import StoreResult, fetch_all_stores, collect_games
+from .loop_monitor import LoopLagMonitor
+from .storage import StoreResultStore
+from .stores.base import BaseStore, FreeGame
+
+
+class OfferSnapshot:
+    def __init__(
+        self,
+        stores: list[BaseStore],
+        ttl: float = 60.0,
+        lag_monitor: Optional[LoopLagMonitor] = None,
+        result_store: Optional[StoreResultStore] = None
+    ):
+        self.stores = stores
+        self.ttl = ttl
+        self.lag_monitor = lag_monitor
+        self.result_store = result_store
+        # Off in gateway processes: refreshing re-reads the results the
+        # fetcher process saved instead of asking the stores, every `ttl`
+        # seconds.
+        self.fetch = True
+        
+        self.results: dict[str, StoreResult] = {}
+        self.refreshed_at: Optional[datetime] = None
+        self._refreshed_monotonic: dict[str, float] = {}
+        self._inflight: dict[str, asyncio.Task] = {}
+        
+        self.hits = 0
+        self.refreshes = 0
+        self.coalesced = 0
+    
+    @property
+    def games(self) -> list[FreeGame]:
+        return collect_games([self.results[store.key] for store in self.stores if store.key in self.results])
+    
+    def is_fresh(self, store: BaseStore) -> bool:
+        if self.fetch:
+            # The scheduled checks keep fetched results current (and back off
+            # while nothing changes); only a store that has never been
+            # checked is asked directly.
+            return store.key in self.results
+        refreshed = self._refreshed_monotonic.get(store.key)
+        if refreshed is None:
+            return False
+        return time.monotonic() - refreshed < self.ttl
+    
+    def restore(self):
+        # Restored results are served until the first scheduled check after
+        # a restart replaces them, and are the fallback if a store is down.
+        if self.result_store is None:
+            return
+        
+        saved = self.result_store.load()
+        for store in self.stores:
+            if store.key in saved and store.key not in self.results:
+                fetched_at, games = saved[store.key]
+                self.results[store.key] = StoreResult(store=store, games=games, fetched_at=fetched_at)
+        print(f"[snapshot] Restored saved offers for {len(saved)} store(s)")
+    
+    async def get(self) -> list[FreeGame]:
+        stale = [store for store in self.stores if not self.is_fresh(store)]
+        if not stale:
+            self.hits += 1
+            return self.games
+        
+        await self.refresh(stale)
+        return self.games
+    
+    async def refresh(self, stores: Optional[list[BaseStore]] = None) -> list[StoreResult]:
+        stores = self.stores if stores is None else stores
+        
+        # Everyone who asks for a store while it is being fetched waits on that
+        # same fetch instead of starting another round of store requests.
+        missing = [store for store in stores if store.key not in self._inflight]
+        self.coalesced += len(stores) - len(missing)
+        if missing:
+            task = asyncio.create_task(self._refresh(missing))
+            for store in missing:
+                self._inflight[store.key] = task
+        
+        tasks = {self._inflight[store.key] for store in stores}
+        
+        # Shielded so a cancelled interaction does not cancel the refresh
+        # that other callers are waiting on.
+        await asyncio.shield(asyncio.gather(*tasks))
+        return [self.results[store.key] for store in stores]
+    
+    async def _refresh(self, stores: list[BaseStore]):
+        try:
+            if not self.fetch:
+                self._reload(stores)
+                return
+            
+            results = await fetch_all_stores(stores, self.lag_monitor)
+            now = time.monotonic()
+            for result in results:
+                previous = self.results.get(result.store.key)
+                if not result.ok and previous and previous.games:
+                    result = self._serve_stale(result, previous)
+                elif result.ok and self.result_store is not None:
+                    self.result_store.save(result.store.key, result.fetched_at, result.games)
+                if self.result_store is not None:
+                    self.result_store.record_check(result.store.key, time.time(), result.error)
+                self.results[result.store.key] = result
+                self._refreshed_monotonic[result.store.key] = now
+            self.refreshed_at = datetime.utcnow()
+            self.refreshes += 1
+        finally:
+            for store in stores:
+                self._inflight.pop(store.key, None)
+    
+    def _reload(self, stores: list[BaseStore]):
+        saved = self.result_store.load() if self.result_store is not None else {}
+        checks = self.result_store.load_checks() if self.result_store is not None else {}
+        now = datetime.utcnow()
+        for store in stores:
+            # Before the fetcher's first good check a store just has no offers.
+            fetched_at, games = saved.get(store.key, (None, []))
+            games = [game for game in games if game.end_date is None or game.end_date > now]
+            # A store whose latest check failed is showing older offers, as
+            # it would be in the fetcher itself.
+            _, error = checks.get(store.key, (None, None))
+            self.results[store.key] = StoreResult(
+                store=store,
+                games=games,
+                error=error,
+                stale=error is not None and bool(games),
+                fetched_at=fetched_at
+            )
+            self._refreshed_monotonic[store.key] = time.monotonic()
+        self.refreshed_at = now
+        self.refreshes += 1
+    
+    def drop(self, key: tuple[str, str]):
+        # Ended offers leave /freegames right away instead of at the next check.
+        for store_key, result in self.results.items():
+            if any(game.key == key for game in result.games):
+                self.results[store_key] = replace(result, games=[game for game in result.games if game.key != key])
+    
+    def _serve_stale(self, result: StoreResult, previous: StoreResult) -> StoreResult:
+        # A store that is down keeps showing what it offered last time, minus
+        # anything that has ended since; the result stays marked as failed so
+        # the scheduler and circuit breaker still see the failure.
+        now = datetime.utcnow()
+        games = [game for game in previous.games if game.end_date is None or game.end_date > now]
+        
+        metrics.STORE_STALE_SERVED.labels(result.store.key).inc()
+        fetched = datetime.utcfromtimestamp(previous.fetched_at) if previous.fetched_at else None
+        since = f" from {fetched:%Y-%m-%d %H:%M} UTC" if fetched else ""
+        print(f"[snapshot] {result.store.name}: {result.error}; serving {len(games)} offer(s){since}")
+        return replace(result, games=games, stale=True, fetched_at=previous.fetched_at)
@@ -0,0 +1,465 @@
+import sqlite3
+import time
+from calendar import timegm
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .stores.base import FreeGame, dump_games, load_games
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posted_offers (
+    store TEXT NOT NULL,
+    offer_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    end_date REAL,
+    posted_at REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (store, offer_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_posted_offers_end_date ON posted_offers (end_date);
+CREATE INDEX IF NOT EXISTS idx_posted_offers_last_seen ON posted_offers (last_seen);
+CREATE TABLE IF NOT EXISTS guild_settings (
+    guild_id INTEGER PRIMARY KEY,
+    channel_id INTEGER,
+    role_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS offer_alerts (
+    store TEXT NOT NULL,
+    offer_id TEXT NOT NULL,
+    end_date REAL NOT NULL,
+    posted_at REAL NOT NULL,
+    reminded INTEGER NOT NULL DEFAULT 0,
+    record BLOB NOT NULL,
+    PRIMARY KEY (store, offer_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS alert_messages (
+    channel_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    store TEXT NOT NULL,
+    offer_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    end_date REAL,
+    PRIMARY KEY (channel_id, message_id, store, offer_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_alert_messages_offer ON alert_messages (store, offer_id);
+CREATE TABLE IF NOT EXISTS deal_events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    published_at REAL NOT NULL,
+    games BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS deal_cursors (
+    consumer TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    seen_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS store_checks (
+    store TEXT PRIMARY KEY,
+    checked_at REAL NOT NULL,
+    error TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS store_results (
+    store TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    games BLOB NOT NULL
+) WITHOUT ROWID;
+"""
+
+# SQLite's default limit on bound parameters is 999; two are used per key.
+_BATCH_SIZE = 400
+
+
+@dataclass
+class GuildConfig:
+    guild_id: int
+    channel_id: Optional[int] = None
+    role_id: Optional[int] = None
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    conn.commit()
+    return conn
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[float]:
+    if value is None:
+        return None
+    return float(timegm(value.utctimetuple()))
+
+
+class PostedGameStore:
+    def __init__(self, path: str, retention_days: float = 14.0):
+        self.path = path
+        self.retention_seconds = retention_days * 86400
+        self._conn: Optional[sqlite3.Connection] = None
+    
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            raise RuntimeError("Posted game store is not open; call open() first")
+        return self._conn
+    
+    def open(self):
+        if self._conn is not None:
+            return
+        
+        self._conn = _connect(self.path)
+        
+        removed = self.prune_expired()
+        print(f"Opened posted game store at {self.path} ({self.count()} tracked, {removed} expired removed)")
+    
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+    
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM posted_offers").fetchone()[0]
+    
+    def filter_new(self, games: Iterable[FreeGame]) -> list[FreeGame]:
+        unique: dict[tuple[str, str], FreeGame] = {}
+        for game in games:
+            unique.setdefault(game.key, game)
+        
+        keys = list(unique)
+        posted: set[tuple[str, str]] = set()
+        for i in range(0, len(keys), _BATCH_SIZE):
+            batch = keys[i:i + _BATCH_SIZE]
+            placeholders = ",".join("(?, ?)" for _ in batch)
+            rows = self.conn.execute(
+                f"SELECT store, offer_id FROM posted_offers WHERE (store, offer_id) IN (VALUES {placeholders})",
+                [part for key in batch for part in key]
+            )
+            posted.update(rows)
+        
+        if posted:
+            now = time.time()
+            # An end date that shows up (or moves) after the offer was posted
+            # decides when the row is pruned.
+            with self.conn:
+                self.conn.executemany(
+                    "UPDATE posted_offers SET last_seen = ?, end_date = COALESCE(?, end_date) WHERE store = ? AND offer_id = ?",
+                    [(now, _timestamp(unique[key].end_date), *key) for key in posted]
+                )
+        
+        return [game for key, game in unique.items() if key not in posted]
+    
+    def mark_posted(self, games: Iterable[FreeGame]):
+        now = time.time()
+        rows = [
+            (game.key[0], game.key[1], game.title, _timestamp(game.end_date), now, now)
+            for game in games
+        ]
+        if not rows:
+            return
+        
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO posted_offers "
+                "(store, offer_id, title, end_date, posted_at, last_seen) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+    
+    def forget(self, keys: Iterable[tuple[str, str]]):
+        with self.conn:
+            self.conn.executemany("DELETE FROM posted_offers WHERE store = ? AND offer_id = ?", list(keys))
+    
+    def prune_expired(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        with self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM posted_offers WHERE end_date < ? OR (end_date IS NULL AND last_seen < ?)",
+                (now, now - self.retention_seconds)
+            )
+        return cursor.rowcount
+
+
+class GuildConfigStore:
+    def __init__(self, path: str):
+        self.path = path
+        self.configs: dict[int, GuildConfig] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+    
+    def open(self):
+        if self._conn is not None:
+            return
+        
+        self._conn = _connect(self.path)
+        rows = self._conn.execute("SELECT guild_id, channel_id, role_id FROM guild_settings")
+        self.configs = {row[0]: GuildConfig(*row) for row in rows}
+        print(f"Loaded notification settings for {len(self.configs)} guild(s)")
+    
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+    
+    def get(self, guild_id: int) -> Optional[GuildConfig]:
+        return self.configs.get(guild_id)
+    
+    def targets(self) -> list[GuildConfig]:
+        return [config for config in self.configs.values() if config.channel_id]
+    
+    def set_channel(self, guild_id: int, channel_id: int) -> GuildConfig:
+        config = self.configs.setdefault(guild_id, GuildConfig(guild_id))
+        config.channel_id = channel_id
+        self._save(config)
+        return config
+    
+    def set_role(self, guild_id: int, role_id: Optional[int]) -> GuildConfig:
+        config = self.configs.setdefault(guild_id, GuildConfig(guild_id))
+        config.role_id = role_id
+        self._save(config)
+        return config
+    
+    def _save(self, config: GuildConfig):
+        if self._conn is None:
+            raise RuntimeError("Guild config store is not open; call open() first")
+        
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO guild_settings (guild_id, channel_id, role_id) VALUES (?, ?, ?)",
+                (config.guild_id, config.channel_id, config.role_id)
+            )
+
+
+class StoreResultStore:
+    # The last good offers of each store, so a restart has something to show
+    # (and to fall back on) before the first check completes.
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+    
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            raise RuntimeError("Store result store is not open; call open() first")
+        return self._conn
+    
+    def open(self):
+        if self._conn is None:
+            self._conn = _connect(self.path)
+    
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+    
+    def load(self) -> dict[str, tuple[float, list[FreeGame]]]:
+        rows = self.conn.execute("SELECT store, fetched_at, games FROM store_results")
+        return {store: (fetched_at, load_games(games)) for store, fetched_at, games in rows}
+    
+    def save(self, store_key: str, fetched_at: float, games: list[FreeGame]):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO store_results (store, fetched_at, games) VALUES (?, ?, ?)",
+                (store_key, fetched_at, dump_games(games))
+            )
+    
+    def load_checks(self) -> dict[str, tuple[float, Optional[str]]]:
+        rows = self.conn.execute("SELECT store, checked_at, error FROM store_checks")
+        return {store: (checked_at, error) for store, checked_at, error in rows}
+    
+    def record_check(self, store_key: str, checked_at: float, error: Optional[str]):
+        # Outcome of the latest check, failed or not, so processes that only
+        # read the saved offers can tell when they are out of date.
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO store_checks (store, checked_at, error) VALUES (?, ?, ?)",
+                (store_key, checked_at, error)
+            )
+
+
+@dataclass
+class AlertMessage:
+    channel_id: int
+    message_id: int
+    # (title, end_date) of every offer in the message.
+    offers: list[tuple[str, Optional[float]]]
+
+
+class AlertStore:
+    # Which Discord messages announced which offers, plus the offers that have
+    # an end date, so reminders and clean-up survive a restart.
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+    
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            raise RuntimeError("Alert store is not open; call open() first")
+        return self._conn
+    
+    def open(self):
+        if self._conn is None:
+            self._conn = _connect(self.path)
+    
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+    
+    def record(self, games: list[FreeGame], sent: list[tuple[int, int, list[tuple[str, str]]]]):
+        now = time.time()
+        by_key = {game.key: game for game in games}
+        dated = [game for game in games if game.end_date is not None]
+        
+        # Every message is kept, even one whose offers have no end date yet:
+        # the date can still turn up on a later check.
+        message_rows = []
+        for channel_id, message_id, keys in sent:
+            offers = [by_key[key] for key in keys if key in by_key]
+            message_rows.extend(
+                (channel_id, message_id, game.key[0], game.key[1], game.title, _timestamp(game.end_date))
+                for game in offers
+            )
+        
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO offer_alerts (store, offer_id, end_date, posted_at, reminded, record) "
+                "VALUES (?, ?, ?, ?, 0, ?)",
+                [(game.key[0], game.key[1], _timestamp(game.end_date), now, dump_games([game])) for game in dated]
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO alert_messages (channel_id, message_id, store, offer_id, title, end_date) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                message_rows
+            )
+    
+    def pending(self) -> list[tuple[FreeGame, float, bool]]:
+        rows = self.conn.execute("SELECT record, posted_at, reminded FROM offer_alerts")
+        return [(load_games(record)[0], posted_at, bool(reminded)) for record, posted_at, reminded in rows]
+    
+    def update_end(self, game: FreeGame):
+        # Also the first end date of an offer announced without one; like
+        # ExpiryIndex.reschedule it then counts as posted before any reminder.
+        end = _timestamp(game.end_date)
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO offer_alerts (store, offer_id, end_date, posted_at, reminded, record) "
+                "VALUES (?, ?, ?, 0, 0, ?) "
+                "ON CONFLICT (store, offer_id) DO UPDATE SET end_date = excluded.end_date, reminded = 0, record = excluded.record",
+                (*game.key, end, dump_games([game]))
+            )
+            self.conn.execute("UPDATE alert_messages SET end_date = ? WHERE store = ? AND offer_id = ?", (end, *game.key))
+    
+    def mark_reminded(self, keys: list[tuple[str, str]]):
+        with self.conn:
+            self.conn.executemany("UPDATE offer_alerts SET reminded = 1 WHERE store = ? AND offer_id = ?", keys)
+    
+    def messages_for(self, key: tuple[str, str]) -> list[AlertMessage]:
+        messages = []
+        for channel_id, message_id in self.conn.execute(
+            "SELECT channel_id, message_id FROM alert_messages WHERE store = ? AND offer_id = ?", key
+        ).fetchall():
+            offers = self.conn.execute(
+                "SELECT title, end_date FROM alert_messages WHERE channel_id = ? AND message_id = ?",
+                (channel_id, message_id)
+            ).fetchall()
+            messages.append(AlertMessage(channel_id, message_id, offers))
+        return messages
+    
+    def prune(self) -> int:
+        # Offers without an end date are kept until the posted offer store
+        # forgets them (OFFER_RETENTION_DAYS after they were last seen).
+        with self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM alert_messages WHERE end_date IS NULL AND NOT EXISTS ("
+                "SELECT 1 FROM posted_offers WHERE posted_offers.store = alert_messages.store "
+                "AND posted_offers.offer_id = alert_messages.offer_id)"
+            )
+        return cursor.rowcount
+    
+    def forget(self, key: tuple[str, str], retired: list[AlertMessage]):
+        with self.conn:
+            self.conn.execute("DELETE FROM offer_alerts WHERE store = ? AND offer_id = ?", key)
+            # A message is done once none of its dated offers is still running.
+            self.conn.executemany(
+                "DELETE FROM alert_messages WHERE channel_id = ? AND message_id = ?",
+                [(message.channel_id, message.message_id) for message in retired]
+            )
+
+
+class DealQueue:
+    # Hands deals from the fetcher process to gateway processes through the
+    # shared database. Each gateway keeps its own cursor, so every one of
+    # them sees every event once; events are only pruned by age.
+    NEW = "new"
+    UPDATED = "updated"
+    
+    def __init__(self, path: str, retention_days: float = 7.0):
+        self.path = path
+        self.retention_seconds = retention_days * 86400
+        self._conn: Optional[sqlite3.Connection] = None
+    
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            raise RuntimeError("Deal queue is not open; call open() first")
+        return self._conn
+    
+    def open(self):
+        if self._conn is None:
+            self._conn = _connect(self.path)
+    
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+    
+    def publish(self, kind: str, games: list[FreeGame]) -> int:
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO deal_events (kind, published_at, games) VALUES (?, ?, ?)",
+                (kind, time.time(), dump_games(games))
+            )
+        return cursor.lastrowid
+    
+    def read(self, consumer: str, limit: int = 50) -> list[tuple[int, str, list[FreeGame]]]:
+        rows = self.conn.execute(
+            "SELECT seq, kind, games FROM deal_events WHERE seq > ? ORDER BY seq LIMIT ?",
+            (self._cursor(consumer), limit)
+        )
+        return [(seq, kind, load_games(games)) for seq, kind, games in rows]
+    
+    def ack(self, consumer: str, seq: int):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE deal_cursors SET seq = MAX(seq, ?), seen_at = ? WHERE consumer = ?",
+                (seq, time.time(), consumer)
+            )
+    
+    def pending(self, consumer: str) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM deal_events WHERE seq > ?", (self._cursor(consumer),)).fetchone()[0]
+    
+    def prune(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        with self.conn:
+            cursor = self.conn.execute("DELETE FROM deal_events WHERE published_at < ?", (now - self.retention_seconds,))
+        return cursor.rowcount
+    
+    def _cursor(self, consumer: str) -> int:
+        row = self.conn.execute("SELECT seq FROM deal_cursors WHERE consumer = ?", (consumer,)).fetchone()
+        if row is not None:
+            return row[0]
+        
+        # A gateway seen for the first time starts where the furthest-behind
+        # gateway is (or at the beginning on a fresh deployment): the fetcher
+        # publishes its first deals before any gateway is ready, and a renamed
+        # gateway must not skip what its old name had not read yet.
+        with self.conn:
+            start = self.conn.execute("SELECT COALESCE(MIN(seq), 0) FROM deal_cursors").fetchone()[0]
+            self.conn.execute(
+                "INSERT OR IGNORE INTO deal_cursors (consumer, seq, seen_at) VALUES (?, ?, ?)",
+                (consumer, start, time.time())
+            )
+        return self.conn.execute("SELECT seq FROM deal_cursors WHERE consumer = ?", (consumer,)).fetchone()[0]
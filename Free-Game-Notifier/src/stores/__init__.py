@@ -1,4 +1,66 @@
-from .epic_games import EpicGamesStore
-from .steam import SteamStore
+import importlib
+from importlib.metadata import entry_points
+from typing import TYPE_CHECKING, Optional
 
-__all__ = ['EpicGamesStore', 'SteamStore']
+if TYPE_CHECKING:
+    from ..http_client import HttpClient
+    from ..parse_pool import ParsePool
+    from .base import BaseStore
+    from .epic_games import EpicGamesStore
+    from .steam import SteamStore
+
+# Store key -> "module:Class". Nothing here is imported until the store is
+# created, so disabled stores (and their parsing libraries) are never loaded.
+BUILTIN_STORES = {
+    "epic": ".epic_games:EpicGamesStore",
+    "steam": ".steam:SteamStore"
+}
+
+# Other packages can add stores by declaring an entry point in this group,
+# e.g. `gog = "freegames_gog.store:GogStore"`.
+ENTRY_POINT_GROUP = "freegames.stores"
+
+_classes: dict[str, type] = {}
+
+
+def available_stores() -> dict[str, str]:
+    stores = dict(BUILTIN_STORES)
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        stores[entry_point.name] = entry_point.value
+    return stores
+
+
+def load_store_class(key: str) -> type["BaseStore"]:
+    store_class = _classes.get(key)
+    if store_class is None:
+        target = available_stores().get(key)
+        if target is None:
+            raise ValueError(f"Unknown store {key!r}; available: {', '.join(available_stores())}")
+        module_name, _, class_name = target.partition(":")
+        store_class = _classes[key] = getattr(importlib.import_module(module_name, __package__), class_name)
+    return store_class
+
+
+def create_stores(http: "HttpClient", parse_pool: Optional["ParsePool"] = None, enabled: Optional[list[str]] = None) -> list["BaseStore"]:
+    keys = enabled if enabled is not None else list(available_stores())
+    stores = []
+    for key in keys:
+        try:
+            store_class = load_store_class(key)
+        except (ValueError, ImportError) as e:
+            print(f"Skipping store {key!r}: {e}")
+            continue
+        stores.append(store_class(http, parse_pool))
+    return stores
+
+
+def __getattr__(name: str):
+    # Keeps `from src.stores import SteamStore` working without importing
+    # every store up front.
+    for key, target in BUILTIN_STORES.items():
+        if target.endswith(f":{name}"):
+            return load_store_class(key)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ['EpicGamesStore', 'SteamStore', 'available_stores', 'load_store_class', 'create_stores']
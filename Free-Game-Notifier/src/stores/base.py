@@ -1,10 +1,38 @@
+import json
+import sys
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from calendar import timegm
+from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Optional
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-@dataclass
+from ..circuit_breaker import CircuitBreaker
+from ..http_client import HttpClient
+from ..parse_pool import ParsePool
+
+
+def _epoch(value: Optional[datetime]) -> Optional[int]:
+    return timegm(value.utctimetuple()) if value is not None else None
+
+
+# FreeGame.to_record drops trailing empty fields; this pads them back.
+_EMPTY_RECORD = [None] * 10
+
+
+# Offers from one store mostly share a handful of start/end times; loading
+# them hands out one datetime per distinct value.
+@lru_cache(maxsize=4096)
+def _from_epoch(value: Optional[int]) -> Optional[datetime]:
+    return datetime.utcfromtimestamp(value) if value is not None else None
+
+
+@dataclass(slots=True, eq=False)
 class FreeGame:
     title: str
     description: str
@@ -13,22 +41,93 @@ class FreeGame:
     image_url: Optional[str] = None
     original_price: Optional[str] = None
     end_date: Optional[datetime] = None
+    offer_id: Optional[str] = None
+    start_date: Optional[datetime] = None
+    # Country code -> local original price, for stores checked in several
+    # regions; None when the offer was only looked up in one.
+    regions: Optional[dict[str, Optional[str]]] = None
+    # Offers are never modified once built, so the key is built once instead
+    # of on every set or dict lookup. Hashing it is cheap (its strings cache
+    # their own hashes), so no separate hash is kept per offer.
+    key: tuple[str, str] = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        # Every offer from a store shares one copy of its name, including
+        # offers loaded back from disk.
+        self.store = sys.intern(self.store)
+        self.key = (self.store, self.offer_id or self.title)
     
     def __hash__(self):
-        return hash((self.title, self.store))
+        return hash(self.key)
     
     def __eq__(self, other):
         if isinstance(other, FreeGame):
-            return self.title == other.title and self.store == other.store
+            return self.key == other.key
         return False
+    
+    def __reduce__(self):
+        # Offers sent back from a parse worker are rebuilt, so the store name
+        # is interned in this process and the key is not pickled with them.
+        return FreeGame, (
+            self.title, self.description, self.store, self.url, self.image_url,
+            self.original_price, self.end_date, self.offer_id, self.start_date, self.regions
+        )
+    
+    def to_record(self) -> list:
+        # Positional and trimmed: trailing empty fields are dropped and dates
+        # are whole UTC seconds.
+        record = [
+            self.store, self.offer_id, self.title, self.description, self.url, self.image_url,
+            self.original_price, _epoch(self.end_date), _epoch(self.start_date), self.regions
+        ]
+        while record[-1] is None:
+            record.pop()
+        return record
+    
+    @classmethod
+    def from_record(cls, record: list) -> "FreeGame":
+        if len(record) < 10:
+            record = record + _EMPTY_RECORD[len(record):]
+        store, offer_id, title, description, url, image_url, original_price, end, start, regions = record
+        return cls(
+            title, description, store, url, image_url, original_price,
+            _from_epoch(end), offer_id, _from_epoch(start), regions
+        )
+
+
+def dump_games(games: list[FreeGame]) -> bytes:
+    records = [game.to_record() for game in games]
+    if orjson is not None:
+        return orjson.dumps(records)
+    return json.dumps(records, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def load_games(data: bytes) -> list[FreeGame]:
+    records = orjson.loads(data) if orjson is not None else json.loads(data)
+    return [FreeGame.from_record(record) for record in records]
 
 
 class BaseStore(ABC):
+    key: str = ""
+    timeout: float = 20.0
+    
+    def __init__(self, http: HttpClient, parse_pool: Optional[ParsePool] = None):
+        self.http = http
+        self.parse_pool = parse_pool or ParsePool("inline")
+        # Offers the store has announced but that are not free yet.
+        self.upcoming: list[FreeGame] = []
+        self.breaker = CircuitBreaker()
+        # When the running check times out (a time.monotonic() value); pass
+        # it on to the HTTP client so retries stay within `timeout`.
+        self.deadline: Optional[float] = None
+    
     @property
     @abstractmethod
     def name(self) -> str:
         pass
     
+    # Raises when the store can't be read, so a failed check is never
+    # mistaken for a store with no free games.
     @abstractmethod
     async def get_free_games(self) -> list[FreeGame]:
         pass
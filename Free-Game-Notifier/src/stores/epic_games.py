@@ -1,119 +1,55 @@
-import aiohttp
+import asyncio
 from datetime import datetime
-from typing import Optional
 from .base import BaseStore, FreeGame
+from .epic_parser import EpicPromotion, merge_regions, parse_promotions, select_offers
 
 
 class EpicGamesStore(BaseStore):
+    key = "epic"
     API_URL = "https://store-site-backend-static.ak.epicgames.com/freeGamesPromotions"
+    # (country, locale) pairs to check. Each region is its own request (and
+    # its own HTTP cache entry); they all go out at once over the shared
+    # session, and offers are merged by ID.
+    regions: list[tuple[str, str]] = [("US", "en-US")]
     
     @property
     def name(self) -> str:
         return "Epic Games Store"
     
     async def get_free_games(self) -> list[FreeGame]:
-        free_games = []
-        
+        tasks = [asyncio.create_task(self._fetch_region(country, locale)) for country, locale in self.regions]
         try:
-            async with aiohttp.ClientSession() as session:
-                params = {
-                    "locale": "en-US",
-                    "country": "US",
-                    "allowCountries": "US"
-                }
-                
-                async with session.get(self.API_URL, params=params) as response:
-                    if response.status != 200:
-                        print(f"Epic Games API returned status {response.status}")
-                        return []
-                    
-                    data = await response.json()
-                    
-                    elements = data.get("data", {}).get("Catalog", {}).get("searchStore", {}).get("elements", [])
-                    
-                    for game in elements:
-                        if self._is_currently_free(game):
-                            free_game = self._parse_game(game)
-                            if free_game:
-                                free_games.append(free_game)
-        
-        except Exception as e:
-            print(f"Error fetching Epic Games: {e}")
-        
-        return free_games
-    
-    def _is_currently_free(self, game: dict) -> bool:
-        promotions = game.get("promotions")
-        if not promotions:
-            return False
+            # Like a failed Steam page, a failed region fails the whole check
+            # rather than making that region's offers look withdrawn.
+            region_promotions = await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
         
-        promotional_offers = promotions.get("promotionalOffers", [])
+        # The parsed payload is cached across polls, so "free right now" is
+        # decided here, against a single clock reading for the whole cycle.
+        now = datetime.utcnow()
+        selected = [select_offers(promotions, now) for promotions in region_promotions]
         
-        for offer_group in promotional_offers:
-            for offer in offer_group.get("promotionalOffers", []):
-                discount_percentage = offer.get("discountSetting", {}).get("discountPercentage", 0)
-                if discount_percentage == 0:
-                    start_date = offer.get("startDate")
-                    end_date = offer.get("endDate")
-                    
-                    if start_date and end_date:
-                        now = datetime.utcnow()
-                        start = datetime.fromisoformat(start_date.replace("Z", "+00:00")).replace(tzinfo=None)
-                        end = datetime.fromisoformat(end_date.replace("Z", "+00:00")).replace(tzinfo=None)
-                        
-                        if start <= now <= end:
-                            return True
+        if len(self.regions) == 1:
+            current, upcoming = selected[0]
+        else:
+            countries = [country for country, _ in self.regions]
+            current = merge_regions([(country, offers[0]) for country, offers in zip(countries, selected)])
+            upcoming = merge_regions([(country, offers[1]) for country, offers in zip(countries, selected)])
         
-        return False
+        self.upcoming = upcoming
+        return current
     
-    def _parse_game(self, game: dict) -> Optional[FreeGame]:
-        try:
-            title = game.get("title", "Unknown Game")
-            description = game.get("description", "No description available")
-            
-            slug = game.get("productSlug") or game.get("urlSlug") or ""
-            if game.get("offerType") == "BUNDLE":
-                url = f"https://store.epicgames.com/en-US/bundles/{slug}"
-            else:
-                url = f"https://store.epicgames.com/en-US/p/{slug}"
-            
-            image_url = None
-            key_images = game.get("keyImages", [])
-            for img in key_images:
-                if img.get("type") in ["Thumbnail", "OfferImageWide", "DieselStoreFrontWide"]:
-                    image_url = img.get("url")
-                    break
-            if not image_url and key_images:
-                image_url = key_images[0].get("url")
-            
-            original_price = None
-            price_info = game.get("price", {}).get("totalPrice", {})
-            if price_info:
-                original = price_info.get("originalPrice", 0)
-                if original > 0:
-                    original_price = f"${original / 100:.2f}"
-            
-            end_date = None
-            promotions = game.get("promotions", {})
-            promotional_offers = promotions.get("promotionalOffers", [])
-            for offer_group in promotional_offers:
-                for offer in offer_group.get("promotionalOffers", []):
-                    if offer.get("discountSetting", {}).get("discountPercentage") == 0:
-                        end_str = offer.get("endDate")
-                        if end_str:
-                            end_date = datetime.fromisoformat(end_str.replace("Z", "+00:00")).replace(tzinfo=None)
-                            break
-            
-            return FreeGame(
-                title=title,
-                description=description[:200] + "..." if len(description) > 200 else description,
-                store=self.name,
-                url=url,
-                image_url=image_url,
-                original_price=original_price,
-                end_date=end_date
-            )
+    async def _fetch_region(self, country: str, locale: str) -> list[EpicPromotion]:
+        params = {
+            "locale": locale,
+            "country": country,
+            "allowCountries": country
+        }
         
-        except Exception as e:
-            print(f"Error parsing Epic game: {e}")
-            return None
+        return await self.http.get_parsed(self.API_URL, self._parse_payload, params=params, store=self.key, deadline=self.deadline)
+    
+    async def _parse_payload(self, body: bytes) -> list[EpicPromotion]:
+        return await self.parse_pool.run(parse_promotions, body, self.name)
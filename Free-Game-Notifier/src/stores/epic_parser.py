@@ -0,0 +1,194 @@
+import gc
+import json
+from dataclasses import dataclass, replace
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+
+from .base import FreeGame
+
+try:
+    import orjson
+    loads = orjson.loads
+    JSON_BACKEND = "orjson"
+except ImportError:
+    loads = json.loads
+    JSON_BACKEND = "json"
+
+
+PREFERRED_IMAGE_TYPES = ("Thumbnail", "OfferImageWide", "DieselStoreFrontWide")
+
+Window = tuple[datetime, datetime]
+
+
+@dataclass
+class EpicPromotion:
+    game: FreeGame
+    # Every 100%-off window the payload lists for the game, current and
+    # upcoming, sorted by start time.
+    windows: list[Window]
+
+
+@lru_cache(maxsize=512)
+def _parse_date(value: str) -> datetime:
+    # A catalog repeats the same handful of rotation timestamps, so each
+    # distinct string is only parsed once.
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+
+
+def parse_promotions(body: bytes, store_name: str) -> list[EpicPromotion]:
+    # Decoding a large catalog allocates hundreds of thousands of dicts and
+    # lists, none of them cyclic; without this the cyclic collector rescans
+    # them over and over and more than doubles the decode time.
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        data = loads(body)
+        elements = (((data.get("data") or {}).get("Catalog") or {}).get("searchStore") or {}).get("elements") or []
+        
+        promotions = []
+        for element in elements:
+            promotion = _parse_element(element, store_name)
+            if promotion:
+                promotions.append(promotion)
+        
+        return promotions
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def select_offers(promotions: list[EpicPromotion], now: datetime) -> tuple[list[FreeGame], list[FreeGame]]:
+    current = []
+    upcoming = []
+    
+    for promotion in promotions:
+        next_window: Optional[Window] = None
+        for start, end in promotion.windows:
+            if start <= now <= end:
+                current.append(_in_window(promotion.game, start, end))
+                next_window = None
+                break
+            if start > now and next_window is None:
+                next_window = (start, end)
+        
+        if next_window:
+            upcoming.append(_in_window(promotion.game, *next_window))
+    
+    return current, upcoming
+
+
+def _in_window(game: FreeGame, start: datetime, end: datetime) -> FreeGame:
+    return FreeGame(
+        title=game.title,
+        description=game.description,
+        store=game.store,
+        url=game.url,
+        image_url=game.image_url,
+        original_price=game.original_price,
+        end_date=end,
+        offer_id=game.offer_id,
+        start_date=start,
+        regions=game.regions
+    )
+
+
+def _free_windows(promotions: dict) -> list[Window]:
+    windows = []
+    for field in ("promotionalOffers", "upcomingPromotionalOffers"):
+        for offer_group in promotions.get(field) or ():
+            for offer in offer_group.get("promotionalOffers") or ():
+                if (offer.get("discountSetting") or {}).get("discountPercentage", 0) != 0:
+                    continue
+                
+                start_date = offer.get("startDate")
+                end_date = offer.get("endDate")
+                if start_date and end_date:
+                    windows.append((_parse_date(start_date), _parse_date(end_date)))
+    
+    windows.sort()
+    return windows
+
+
+def _format_price(price_info: dict) -> Optional[str]:
+    original = price_info.get("originalPrice", 0)
+    if original <= 0:
+        return None
+    
+    # Epic formats the price for the region it was asked about ("£15.99",
+    # "19,99 €"); older payloads only carry the amount in minor units.
+    formatted = (price_info.get("fmtPrice") or {}).get("originalPrice")
+    if formatted and formatted != "0":
+        return formatted
+    
+    currency = price_info.get("currencyCode") or "USD"
+    decimals = (price_info.get("currencyInfo") or {}).get("decimals", 2)
+    amount = original / 10 ** decimals
+    if currency == "USD":
+        return f"${amount:.2f}"
+    return f"{amount:.{decimals}f} {currency}"
+
+
+def _parse_element(game: dict, store_name: str) -> Optional[EpicPromotion]:
+    promotions = game.get("promotions")
+    if not promotions:
+        return None
+    
+    windows = _free_windows(promotions)
+    if not windows:
+        return None
+    
+    try:
+        title = game.get("title", "Unknown Game")
+        description = game.get("description", "No description available")
+        
+        slug = game.get("productSlug") or game.get("urlSlug") or ""
+        if game.get("offerType") == "BUNDLE":
+            url = f"https://store.epicgames.com/en-US/bundles/{slug}"
+        else:
+            url = f"https://store.epicgames.com/en-US/p/{slug}"
+        
+        image_url = None
+        key_images = game.get("keyImages") or []
+        for img in key_images:
+            if img.get("type") in PREFERRED_IMAGE_TYPES:
+                image_url = img.get("url")
+                break
+        if not image_url and key_images:
+            image_url = key_images[0].get("url")
+        
+        original_price = _format_price((game.get("price") or {}).get("totalPrice") or {})
+        
+        offer_id = None
+        if game.get("namespace") and game.get("id"):
+            offer_id = f"{game['namespace']}:{game['id']}"
+        
+        free_game = FreeGame(
+            title=title,
+            description=description[:200] + "..." if len(description) > 200 else description,
+            store=store_name,
+            url=url,
+            image_url=image_url,
+            original_price=original_price,
+            offer_id=offer_id
+        )
+        return EpicPromotion(game=free_game, windows=windows)
+    
+    except Exception as e:
+        print(f"Error parsing Epic game: {e}")
+        return None
+
+
+def merge_regions(offers_by_region: list[tuple[str, list[FreeGame]]]) -> list[FreeGame]:
+    # One offer per Epic offer ID. The first region listing it supplies the
+    # details; every region it is free in adds its local price.
+    merged: dict[tuple[str, str], FreeGame] = {}
+    regions: dict[tuple[str, str], dict[str, Optional[str]]] = {}
+    for country, offers in offers_by_region:
+        for game in offers:
+            if game.key not in merged:
+                merged[game.key] = game
+                regions[game.key] = {}
+            regions[game.key].setdefault(country, game.original_price)
+    
+    return [replace(game, regions=regions[key]) for key, game in merged.items()]
@@ -1,99 +1,92 @@
-import aiohttp
-from bs4 import BeautifulSoup
+import asyncio
 from typing import Optional
+
+from ..http_client import HttpClient
+from ..parse_pool import ParsePool
 from .base import BaseStore, FreeGame
+from .steam_details import SteamAppDetails
+
+
+def parse_page(body: bytes, store_name: str, backend: str) -> tuple[list[FreeGame], int]:
+    # The parser pulls in bs4/lxml; importing it here means that cost is paid
+    # by the first parse, inside the parse pool, instead of at startup.
+    from .steam_parser import parse_results_page
+    return parse_results_page(body, store_name, backend)
 
 
 class SteamStore(BaseStore):
-    SEARCH_URL = "https://store.steampowered.com/search/"
+    key = "steam"
+    SEARCH_RESULTS_URL = "https://store.steampowered.com/search/results/"
+    # "fast" parses only the results container with the quickest installed
+    # backend; "reference" is the full html.parser + CSS selector path.
+    parser_backend = "fast"
+    page_size = 50
+    page_concurrency = 4
+    max_pages = 20
+    
+    def __init__(self, http: HttpClient, parse_pool: Optional[ParsePool] = None):
+        super().__init__(http, parse_pool)
+        self.details = SteamAppDetails(http, self.parse_pool)
     
     @property
     def name(self) -> str:
         return "Steam"
     
     async def get_free_games(self) -> list[FreeGame]:
-        free_games = []
+        games, total_count = await self._fetch_page(0)
+        seen = {game.key for game in games}
+        free_games = list(games)
         
-        try:
-            async with aiohttp.ClientSession() as session:
-                params = {
-                    "maxprice": "free",
-                    "specials": "1",
-                    "cc": "us"
-                }
-                
-                headers = {
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                    "Accept-Language": "en-US,en;q=0.9",
-                    "Cookie": "birthtime=0; mature_content=1"
-                }
-                
-                async with session.get(self.SEARCH_URL, params=params, headers=headers) as response:
-                    if response.status != 200:
-                        print(f"Steam search returned status {response.status}")
-                        return []
-                    
-                    html = await response.text()
-                    soup = BeautifulSoup(html, "html.parser")
-                    
-                    search_results = soup.select("#search_resultsRows a.search_result_row")
-                    
-                    for result in search_results[:20]:
-                        free_game = await self._parse_search_result(result, session)
-                        if free_game:
-                            free_games.append(free_game)
-        
-        except Exception as e:
-            print(f"Error fetching Steam games: {e}")
+        starts = list(range(self.page_size, min(total_count, self.page_size * self.max_pages), self.page_size))
         
-        return free_games
-    
-    async def _parse_search_result(self, result, session: aiohttp.ClientSession) -> Optional[FreeGame]:
-        try:
-            url = result.get("href", "")
-            if not url:
-                return None
-            
-            title_elem = result.select_one(".title")
-            title = title_elem.get_text(strip=True) if title_elem else "Unknown Game"
-            
-            discount_pct_elem = result.select_one(".discount_pct")
-            if not discount_pct_elem:
-                return None
+        # Pages are requested a window at a time; each one is parsed as soon as
+        # it arrives and only its games are kept. A window in which some page
+        # adds nothing new ends the walk. A page that still fails after the
+        # client's retries fails the whole check rather than returning a
+        # partial list that would look like offers disappearing.
+        for i in range(0, len(starts), self.page_concurrency):
+            window = starts[i:i + self.page_concurrency]
+            exhausted = False
             
-            discount_text = discount_pct_elem.get_text(strip=True)
-            if "-100%" not in discount_text:
-                return None
-            
-            original_price = None
-            discount_elem = result.select_one(".discount_original_price")
-            if discount_elem:
-                original_price = discount_elem.get_text(strip=True)
-            
-            if not original_price:
-                return None
-            
-            final_price_elem = result.select_one(".discount_final_price")
-            if final_price_elem:
-                final_price = final_price_elem.get_text(strip=True).lower()
-                if "free" not in final_price and final_price != "$0.00":
-                    return None
-            
-            image_elem = result.select_one("img")
-            image_url = image_elem.get("src") if image_elem else None
-            
-            description = f"Originally {original_price} - Now 100% OFF!"
+            tasks = [asyncio.create_task(self._fetch_page(start)) for start in window]
+            try:
+                for next_page in asyncio.as_completed(tasks):
+                    page_games, _ = await next_page
+                    
+                    new_games = [game for game in page_games if game.key not in seen]
+                    if not new_games:
+                        exhausted = True
+                    for game in new_games:
+                        seen.add(game.key)
+                        free_games.append(game)
+            finally:
+                # On failure or timeout, don't leave the rest of the window running.
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
             
-            return FreeGame(
-                title=title,
-                description=description,
-                store=self.name,
-                url=url,
-                image_url=image_url,
-                original_price=original_price,
-                end_date=None
-            )
+            if exhausted:
+                break
+        
+        return await self.details.enrich(free_games, store=self.key, deadline=self.deadline)
+    
+    async def _fetch_page(self, start: int) -> tuple[list[FreeGame], int]:
+        params = {
+            "maxprice": "free",
+            "specials": "1",
+            "cc": "us",
+            "infinite": "1",
+            "start": str(start),
+            "count": str(self.page_size)
+        }
         
-        except Exception as e:
-            print(f"Error parsing Steam result: {e}")
-            return None
+        headers = {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+            "Accept-Language": "en-US,en;q=0.9",
+            "Cookie": "birthtime=0; mature_content=1"
+        }
+        
+        return await self.http.get_parsed(self.SEARCH_RESULTS_URL, self._parse_results_page, params=params, headers=headers, store=self.key, deadline=self.deadline)
+    
+    async def _parse_results_page(self, body: bytes) -> tuple[list[FreeGame], int]:
+        return await self.parse_pool.run(parse_page, body, self.name, self.parser_backend)
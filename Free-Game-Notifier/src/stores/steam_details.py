@@ -0,0 +1,162 @@
+import asyncio
+import html
+import json
+import time
+from calendar import timegm
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Optional
+
+from ..http_client import HttpClient
+from ..parse_pool import ParsePool
+from .base import FreeGame
+
+ASSET_BASE_URL = "https://shared.akamai.steamstatic.com/store_item_assets/"
+
+
+@dataclass
+class AppDetails:
+    description: Optional[str] = None
+    header_image: Optional[str] = None
+    discount_end: Optional[datetime] = None
+
+
+def parse_store_items(body: bytes) -> dict[str, AppDetails]:
+    items = json.loads(body).get("response", {}).get("store_items", [])
+    details = {}
+    for item in items:
+        appid = item.get("appid") or item.get("id")
+        if not appid:
+            continue
+        if item.get("success") != 1:
+            details[str(appid)] = AppDetails()
+            continue
+        
+        description = (item.get("basic_info") or {}).get("short_description")
+        
+        assets = item.get("assets") or {}
+        header, url_format = assets.get("header"), assets.get("asset_url_format")
+        header_image = ASSET_BASE_URL + url_format.replace("${FILENAME}", header) if header and url_format else None
+        
+        # With several discounts stacked the price is only free until the
+        # first of them runs out.
+        discounts = (item.get("best_purchase_option") or {}).get("active_discounts") or []
+        ends = [discount["discount_end_date"] for discount in discounts if discount.get("discount_end_date")]
+        
+        details[str(appid)] = AppDetails(
+            description=html.unescape(description).strip() if description else None,
+            header_image=header_image,
+            discount_end=datetime.utcfromtimestamp(min(ends)) if ends else None
+        )
+    return details
+
+
+class SteamAppDetails:
+    # Fills in what the search page doesn't show (description, header image
+    # and when the discount ends) from the store's item API. Details are
+    # cached per appid, requested in batches a few at a time, and whatever
+    # hasn't arrived when the budget runs out is left for the next check.
+    API_URL = "https://api.steampowered.com/IStoreBrowseService/GetItems/v1/"
+    
+    def __init__(
+        self,
+        http: HttpClient,
+        parse_pool: ParsePool,
+        ttl: float = 6 * 3600,
+        batch_size: int = 50,
+        concurrency: int = 4,
+        budget: float = 3.0
+    ):
+        self.http = http
+        self.parse_pool = parse_pool
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.budget = budget
+        
+        # appid -> (expires_at, details)
+        self._cache: dict[str, tuple[float, AppDetails]] = {}
+    
+    async def enrich(self, games: list[FreeGame], store: str = "steam", deadline: Optional[float] = None) -> list[FreeGame]:
+        if self.budget <= 0:
+            return games
+        
+        now = time.time()
+        self._cache = {appid: entry for appid, entry in self._cache.items() if entry[0] > now}
+        
+        appids = {game.offer_id for game in games if game.offer_id and game.offer_id.isdigit()}
+        missing = sorted(appid for appid in appids if appid not in self._cache)
+        if missing:
+            await self._fetch(missing, store, deadline)
+        
+        return [self._apply(game) for game in games]
+    
+    async def _fetch(self, appids: list[str], store: str, deadline: Optional[float]):
+        start = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        # No retry is worth starting once the budget is spent.
+        budget_end = time.monotonic() + self.budget
+        deadline = budget_end if deadline is None else min(deadline, budget_end)
+        
+        async def fetch_batch(batch: list[str]):
+            async with semaphore:
+                details = await self.http.get_parsed(
+                    self.API_URL, self._parse, params=self._params(batch), store=store, deadline=deadline
+                )
+            self._store(batch, details)
+        
+        tasks = [
+            asyncio.create_task(fetch_batch(appids[i:i + self.batch_size]))
+            for i in range(0, len(appids), self.batch_size)
+        ]
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=self.budget)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        # Missing details only cost the alert its extras, never the check.
+        failed = [task.exception() for task in done if task.exception() is not None]
+        for error in failed[:1]:
+            print(f"[steam] App details request failed: {type(error).__name__}: {error}")
+        
+        fetched = sum(appid in self._cache for appid in appids)
+        note = f", {len(pending)} batch(es) over the {self.budget:.1f}s budget" if pending else ""
+        print(f"[steam] Details for {fetched}/{len(appids)} app(s) in {time.perf_counter() - start:.2f}s{note}")
+    
+    def _store(self, batch: list[str], details: dict[str, AppDetails]):
+        now = time.time()
+        for appid in batch:
+            entry = details.get(appid, AppDetails())
+            expires_at = now + self.ttl
+            # Look again once the discount is over in case it was extended.
+            if entry.discount_end is not None:
+                expires_at = min(expires_at, timegm(entry.discount_end.utctimetuple()))
+            self._cache[appid] = (expires_at, entry)
+    
+    def _apply(self, game: FreeGame) -> FreeGame:
+        entry = self._cache.get(game.offer_id) if game.offer_id else None
+        if entry is None:
+            return game
+        
+        details = entry[1]
+        if details.description is None and details.header_image is None and details.discount_end is None:
+            return game
+        return replace(
+            game,
+            description=details.description or game.description,
+            image_url=details.header_image or game.image_url,
+            end_date=details.discount_end or game.end_date
+        )
+    
+    def _params(self, batch: list[str]) -> dict:
+        request = {
+            "ids": [{"appid": int(appid)} for appid in batch],
+            "context": {"language": "english", "country_code": "US"},
+            "data_request": {"include_basic_info": True, "include_assets": True, "include_all_purchase_options": True}
+        }
+        return {"input_json": json.dumps(request, separators=(",", ":"))}
+    
+    async def _parse(self, body: bytes) -> dict[str, AppDetails]:
+        return await self.parse_pool.run(parse_store_items, body)
@@ -0,0 +1,275 @@
+import json
+import re
+from typing import Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from .base import FreeGame
+
+try:
+    from lxml import etree, html as lxml_html
+    FAST_BACKEND = "lxml"
+except ImportError:
+    lxml_html = None
+    FAST_BACKEND = "html.parser"
+
+
+RESULTS_CONTAINER_ID = "search_resultsRows"
+_RESULTS_STRAINER = SoupStrainer(id=RESULTS_CONTAINER_ID)
+_ITEM_ID_RE = re.compile(r"/(app|sub|bundle)/(\d+)")
+
+
+def _class_xpath(class_name: str):
+    return etree.XPath(f".//*[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')][1]")
+
+
+if lxml_html is not None:
+    _XPATH_ROWS = etree.XPath(
+        "//*[@id=$container]//a[contains(concat(' ', normalize-space(@class), ' '), ' search_result_row ')]"
+    )
+    _XPATH_TITLE = _class_xpath("title")
+    _XPATH_DISCOUNT_PCT = _class_xpath("discount_pct")
+    _XPATH_ORIGINAL_PRICE = _class_xpath("discount_original_price")
+    _XPATH_FINAL_PRICE = _class_xpath("discount_final_price")
+    _XPATH_IMG = etree.XPath(".//img[1]")
+
+
+def parse_search_html(html: str, store_name: str, limit: Optional[int] = 20, backend: str = "fast") -> list[FreeGame]:
+    games = None
+    if backend == "fast":
+        if lxml_html is not None:
+            games = parse_search_html_lxml(html, store_name, limit)
+        else:
+            games = parse_search_html_fast(html, store_name, limit)
+    
+    if games is None:
+        # No results container on the page: the markup changed or this is
+        # not a search page, so let the full parser have a go.
+        games = parse_search_html_reference(html, store_name, limit)
+    return games
+
+
+def parse_results_page(body: bytes, store_name: str, backend: str = "fast") -> tuple[list[FreeGame], int]:
+    data = json.loads(body)
+    if not data.get("success"):
+        raise ValueError("Steam search results request was not successful")
+    
+    games = parse_search_rows(data.get("results_html", ""), store_name, backend=backend)
+    return games, int(data.get("total_count", 0))
+
+
+def parse_search_rows(rows_html: str, store_name: str, backend: str = "fast") -> list[FreeGame]:
+    # The paged results endpoint returns just the row anchors, without the
+    # container the page parsers look for.
+    html = f'<div id="{RESULTS_CONTAINER_ID}">{rows_html}</div>'
+    return parse_search_html(html, store_name, limit=None, backend=backend)
+
+
+def parse_search_html_reference(html: str, store_name: str, limit: Optional[int] = 20) -> list[FreeGame]:
+    soup = BeautifulSoup(html, "html.parser")
+    
+    free_games = []
+    search_results = soup.select(f"#{RESULTS_CONTAINER_ID} a.search_result_row")
+    
+    for result in search_results[:limit]:
+        free_game = _parse_row_reference(result, store_name)
+        if free_game:
+            free_games.append(free_game)
+    
+    return free_games
+
+
+def parse_search_html_fast(
+    html: str,
+    store_name: str,
+    limit: Optional[int] = 20,
+    parser: str = FAST_BACKEND
+) -> Optional[list[FreeGame]]:
+    # Only the results container is turned into a tree; the page chrome
+    # around it is skipped by the tokenizer.
+    soup = BeautifulSoup(html, parser, parse_only=_RESULTS_STRAINER)
+    container = soup.find(id=RESULTS_CONTAINER_ID)
+    if container is None:
+        return None
+    
+    free_games = []
+    for result in container.find_all("a", class_="search_result_row", limit=limit):
+        free_game = _parse_row_fast(result, store_name)
+        if free_game:
+            free_games.append(free_game)
+    
+    return free_games
+
+
+def parse_search_html_lxml(html: str, store_name: str, limit: Optional[int] = 20) -> Optional[list[FreeGame]]:
+    # Builds a plain lxml tree instead of a BeautifulSoup one, which is several
+    # times cheaper, and walks it with precompiled XPath expressions.
+    if lxml_html is None or not html.strip():
+        return None
+    
+    root = lxml_html.document_fromstring(html)
+    if root.get_element_by_id(RESULTS_CONTAINER_ID, None) is None:
+        return None
+    
+    free_games = []
+    for result in _XPATH_ROWS(root, container=RESULTS_CONTAINER_ID)[:limit]:
+        free_game = _parse_row_lxml(result, store_name)
+        if free_game:
+            free_games.append(free_game)
+    
+    return free_games
+
+
+def _parse_row_reference(result, store_name: str) -> Optional[FreeGame]:
+    try:
+        url = result.get("href", "")
+        if not url:
+            return None
+        
+        title_elem = result.select_one(".title")
+        title = title_elem.get_text(strip=True) if title_elem else "Unknown Game"
+        
+        discount_pct_elem = result.select_one(".discount_pct")
+        if not discount_pct_elem:
+            return None
+        
+        discount_text = discount_pct_elem.get_text(strip=True)
+        if "-100%" not in discount_text:
+            return None
+        
+        original_price = None
+        discount_elem = result.select_one(".discount_original_price")
+        if discount_elem:
+            original_price = discount_elem.get_text(strip=True)
+        
+        if not original_price:
+            return None
+        
+        final_price_elem = result.select_one(".discount_final_price")
+        if final_price_elem:
+            final_price = final_price_elem.get_text(strip=True).lower()
+            if "free" not in final_price and final_price != "$0.00":
+                return None
+        
+        image_elem = result.select_one("img")
+        image_url = image_elem.get("src") if image_elem else None
+        
+        return _build_game(result, store_name, url, title, original_price, image_url)
+    
+    except Exception as e:
+        print(f"Error parsing Steam result: {e}")
+        return None
+
+
+def _parse_row_fast(result, store_name: str) -> Optional[FreeGame]:
+    # Same rules as _parse_row_reference, but the cheap rejections come first
+    # and lookups use find() instead of CSS selectors.
+    try:
+        url = result.get("href", "")
+        if not url:
+            return None
+        
+        discount_pct_elem = result.find(class_="discount_pct")
+        if discount_pct_elem is None or "-100%" not in discount_pct_elem.get_text(strip=True):
+            return None
+        
+        discount_elem = result.find(class_="discount_original_price")
+        original_price = discount_elem.get_text(strip=True) if discount_elem else None
+        if not original_price:
+            return None
+        
+        final_price_elem = result.find(class_="discount_final_price")
+        if final_price_elem is not None:
+            final_price = final_price_elem.get_text(strip=True).lower()
+            if "free" not in final_price and final_price != "$0.00":
+                return None
+        
+        title_elem = result.find(class_="title")
+        title = title_elem.get_text(strip=True) if title_elem else "Unknown Game"
+        
+        image_elem = result.find("img")
+        image_url = image_elem.get("src") if image_elem else None
+        
+        return _build_game(result, store_name, url, title, original_price, image_url)
+    
+    except Exception as e:
+        print(f"Error parsing Steam result: {e}")
+        return None
+
+
+def _lxml_text(element) -> str:
+    # Matches BeautifulSoup's get_text(strip=True).
+    return "".join(text.strip() for text in element.itertext())
+
+
+def _first(xpath, element):
+    found = xpath(element)
+    return found[0] if found else None
+
+
+def _parse_row_lxml(result, store_name: str) -> Optional[FreeGame]:
+    try:
+        url = result.get("href", "")
+        if not url:
+            return None
+        
+        discount_pct_elem = _first(_XPATH_DISCOUNT_PCT, result)
+        if discount_pct_elem is None or "-100%" not in _lxml_text(discount_pct_elem):
+            return None
+        
+        discount_elem = _first(_XPATH_ORIGINAL_PRICE, result)
+        original_price = _lxml_text(discount_elem) if discount_elem is not None else None
+        if not original_price:
+            return None
+        
+        final_price_elem = _first(_XPATH_FINAL_PRICE, result)
+        if final_price_elem is not None:
+            final_price = _lxml_text(final_price_elem).lower()
+            if "free" not in final_price and final_price != "$0.00":
+                return None
+        
+        title_elem = _first(_XPATH_TITLE, result)
+        title = _lxml_text(title_elem) if title_elem is not None else "Unknown Game"
+        
+        image_elem = _first(_XPATH_IMG, result)
+        image_url = image_elem.get("src") if image_elem is not None else None
+        
+        return _build_game(result, store_name, url, title, original_price, image_url)
+    
+    except Exception as e:
+        print(f"Error parsing Steam result: {e}")
+        return None
+
+
+def _build_game(result, store_name: str, url: str, title: str, original_price: str, image_url: Optional[str]) -> FreeGame:
+    return FreeGame(
+        title=title,
+        description=f"Originally {original_price} - Now 100% OFF!",
+        store=store_name,
+        url=url,
+        image_url=image_url,
+        original_price=original_price,
+        end_date=None,
+        offer_id=_offer_id(result, url)
+    )
+
+
+def _offer_id(result, url: str) -> Optional[str]:
+    appid = result.get("data-ds-appid")
+    if appid:
+        return appid
+    
+    package_id = result.get("data-ds-packageid")
+    if package_id:
+        return f"sub/{package_id}"
+    
+    bundle_id = result.get("data-ds-bundleid")
+    if bundle_id:
+        return f"bundle/{bundle_id}"
+    
+    match = _ITEM_ID_RE.search(url)
+    if match:
+        kind, item_id = match.groups()
+        return item_id if kind == "app" else f"{kind}/{item_id}"
+    
+    return None
@@ -0,0 +1,89 @@
+import asyncio
+import os
+from typing import TYPE_CHECKING, Optional
+
+from .expiry import ExpiryIndex
+from .pipeline import CheckPipeline
+from .storage import AlertStore, DealQueue
+from .stores.base import BaseStore, FreeGame
+
+if TYPE_CHECKING:
+    from .keep_alive import MetricsServer
+
+
+class FetcherWorker:
+    # The store side of a split deployment. It checks the stores once for
+    # every gateway process and publishes new deals (and changed end dates)
+    # to the deal queue, so store traffic stays the same however many shards
+    # and guilds there are.
+    POLL_SECONDS = 30
+    
+    def __init__(self):
+        database_path = os.getenv("DATABASE_PATH", "data/freegames.db")
+        self.pipeline = CheckPipeline(database_path)
+        self.deal_queue = DealQueue(database_path)
+        # Read-only here: the gateways record their alerts, the worker only
+        # uses them to know which end dates to keep an eye on after a restart.
+        self.alerts = AlertStore(database_path)
+        self.expiry = ExpiryIndex(reminder_hours=0)
+        
+        self.metrics_server: Optional["MetricsServer"] = None
+        metrics_port = os.getenv("METRICS_PORT")
+        if metrics_port:
+            from .keep_alive import MetricsServer
+            self.metrics_server = MetricsServer(os.getenv("METRICS_HOST", "127.0.0.1"), int(metrics_port))
+    
+    async def run(self):
+        await self.start()
+        print(f"Fetcher worker checking {len(self.pipeline.stores)} store(s)")
+        try:
+            while True:
+                due = self.pipeline.due_stores()
+                if due:
+                    try:
+                        await self.check(due)
+                    except Exception as e:
+                        # Store failures already come back as results; this is
+                        # the rest (a locked database, a full disk). The gateways
+                        # depend on this process, so log it and keep going.
+                        print(f"[worker] Check failed: {type(e).__name__}: {e}")
+                        for store in due:
+                            if self.pipeline.scheduler.is_due(store.key):
+                                self.pipeline.scheduler.postpone(store.key)
+                await asyncio.sleep(self.POLL_SECONDS)
+        finally:
+            await self.stop()
+    
+    async def start(self):
+        await self.pipeline.open()
+        self.deal_queue.open()
+        self.alerts.open()
+        for game, posted_at, _ in self.alerts.pending():
+            self.expiry.add(game, posted_at)
+        if self.metrics_server:
+            await self.metrics_server.start()
+    
+    async def stop(self):
+        if self.metrics_server:
+            await self.metrics_server.stop()
+        await self.pipeline.close()
+        self.deal_queue.close()
+        self.alerts.close()
+    
+    async def check(self, stores: Optional[list[BaseStore]] = None) -> list[FreeGame]:
+        all_free_games, new_games = await self.pipeline.check(stores)
+        if new_games:
+            seq = self.deal_queue.publish(DealQueue.NEW, new_games)
+            print(f"[worker] Published {len(new_games)} new deal(s) as event {seq}")
+            for game in new_games:
+                self.expiry.add(game)
+        
+        changed = [game for game in all_free_games if self.expiry.reschedule(game)]
+        if changed:
+            seq = self.deal_queue.publish(DealQueue.UPDATED, changed)
+            print(f"[worker] Published {len(changed)} changed end date(s) as event {seq}")
+        
+        # Ended offers need no more watching; the gateways clean up after them.
+        self.expiry.due()
+        self.deal_queue.prune()
+        return new_games